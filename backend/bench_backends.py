@@ -0,0 +1,97 @@
+"""
+Compares the torch and quantized ONNX inference backends.
+
+Each backend is loaded in its own subprocess so resident memory is measured
+cleanly. Reports tweets/sec at a fixed batch size, p50/p99 single-tweet latency,
+peak RSS and the fraction of tweets on which both backends agree on the label.
+
+    python3 bench_backends.py --corpus ../webscraper/results.txt --tweets 2000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def load_corpus(path: str, size: int) -> list:
+    """Tweets in results.txt are separated by lines of dashes"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        chunks = f.read().split("-----------------------------------")
+    tweets = [chunk.strip() for chunk in chunks if chunk.strip()]
+    return [tweets[i % len(tweets)] for i in range(size)]
+
+
+def run_backend(backend: str, corpus: list, batch_size: int, latency_samples: int) -> dict:
+    from model_backends import load_classifier
+
+    start = time.perf_counter()
+    classifier = load_classifier(backend)
+    load_seconds = time.perf_counter() - start
+
+    classifier(corpus[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    predictions = []
+    for i in range(0, len(corpus), batch_size):
+        batch = corpus[i:i + batch_size]
+        predictions.extend(classifier(batch, batch_size=len(batch)))
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    for text in corpus[:latency_samples]:
+        t0 = time.perf_counter()
+        classifier([text], batch_size=1)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "tweets_per_second": len(corpus) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "labels": [p["label"] for p in predictions],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="../webscraper/results.txt")
+    parser.add_argument("--tweets", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.tweets)
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, corpus, args.batch_size, args.latency_samples)))
+        return
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--backend", backend, "--corpus", args.corpus,
+             "--tweets", str(args.tweets), "--batch-size", str(args.batch_size),
+             "--latency-samples", str(args.latency_samples)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'backend':<8} {'load s':>8} {'tweets/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'peak RSS MB':>12}")
+    for backend, r in results.items():
+        print(f"{backend:<8} {r['load_seconds']:8.1f} {r['tweets_per_second']:10.1f} "
+              f"{r['p50_ms']:8.2f} {r['p99_ms']:8.2f} {r['peak_rss_mb']:12.0f}")
+
+    agree = sum(a == b for a, b in zip(results["torch"]["labels"], results["onnx"]["labels"]))
+    print(f"label agreement: {agree}/{len(corpus)} ({100 * agree / len(corpus):.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
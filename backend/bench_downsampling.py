@@ -0,0 +1,68 @@
+"""
+LTTB downsampling cost on a synthetic minute-level price series (random walk),
+and the payload saved by formatting only the kept points.
+
+    python3 bench_downsampling.py --size 5000000 --points 500 1000 2000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from downsampling import lttb
+
+
+def synthetic_series(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(size, dtype=np.float64) * 60  # one point per minute
+    y = 96000 * np.exp(np.cumsum(rng.normal(0, 5e-4, size)))
+    return x, y
+
+
+def best_of(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def formatted_size(x: np.ndarray, y: np.ndarray) -> int:
+    origin = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    points = [
+        {"time": (origin + timedelta(seconds=float(t))).strftime("%b %d, %H:%M"), "price": float(p)}
+        for t, p in zip(x, y)
+    ]
+    return len(json.dumps({"prices": points}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=5_000_000)
+    parser.add_argument("--points", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    x, y = synthetic_series(args.size)
+    print(f"series: {args.size:,} points")
+
+    sample = 100_000
+    _, format_seconds = best_of(lambda: formatted_size(x[:sample], y[:sample]), 1)
+    full_size = formatted_size(x[:sample], y[:sample]) * args.size / sample
+    print(f"format all points (extrapolated from {sample:,}): "
+          f"{format_seconds * args.size / sample:7.2f}s  {full_size / 1e6:8.1f} MB JSON")
+
+    for points in args.points:
+        indices, seconds = best_of(lambda: lttb(x, y, points), args.repeat)
+        size = formatted_size(x[indices], y[indices])
+        # How much of the full series' range the kept points still cover
+        kept_range = np.ptp(y[indices]) / np.ptp(y)
+        print(f"lttb -> {points:>5} points: {seconds * 1000:8.1f}ms  {size / 1e3:8.1f} kB JSON  "
+              f"range kept {kept_range:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
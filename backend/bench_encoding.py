@@ -0,0 +1,104 @@
+"""
+Payload size and serialization time of the row and columnar response formats
+for a 10k-point price series and 10k sentiment documents, raw and compressed.
+
+Rows go through the same steps FastAPI applies (response-model validation for
+sentiments, jsonable_encoder + json.dumps); columnar bodies use orjson.
+
+    python3 bench_encoding.py --size 10000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from columnar import price_columns, sentiment_columns
+from compression import Compressor, brotli
+from main import SentimentData, format_prices
+
+
+def synthetic_prices(size: int):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    price = 96000.0
+    entries = []
+    for i in range(size):
+        price *= 1 + random.gauss(0, 5e-4)
+        entries.append({"timestamp": start + timedelta(minutes=i), "price": round(price, 2)})
+    return entries
+
+
+def synthetic_sentiments(size: int):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "_id": ObjectId(),
+        "type": random.choice(["Bullish", "Bearish", "Neutral"]),
+        "coefficient": random.random(),
+        "followC": random.randint(0, 100000),
+        "likeC": random.randint(0, 10000),
+        "viewC": random.randint(0, 1000000),
+        "date": start + timedelta(seconds=i * 30),
+        "coinType": random.choice([["Bitcoin", "BTC"], ["Solana", "SOL"], ["Pepe", "PEPE"]]),
+    } for i in range(size)]
+
+
+def rows_prices(entries):
+    return json.dumps(jsonable_encoder({"prices": format_prices(entries, 1)})).encode()
+
+
+def rows_sentiments(documents, adapter=TypeAdapter(List[SentimentData])):
+    rows = [{**document, "_id": str(document["_id"])} for document in documents]
+    validated = adapter.validate_python(rows)
+    return json.dumps(adapter.dump_python(validated, mode="json", by_alias=True)).encode()
+
+
+def columnar_prices(entries):
+    return orjson.dumps({"prices": price_columns(entries)})
+
+
+def columnar_sentiments(documents):
+    return orjson.dumps(sentiment_columns(documents))
+
+
+def best_of(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def report(label: str, encode, repeat: int):
+    body, seconds = best_of(encode, repeat)
+    line = f"{label:<22} {seconds * 1000:7.1f}ms  raw {len(body) / 1e3:7.1f} kB"
+    for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+        compressed, compress_seconds = best_of(lambda: Compressor(encoding, 6, 5).finish(body), repeat)
+        line += f"  {encoding} {len(compressed) / 1e3:6.1f} kB ({compress_seconds * 1000:5.1f}ms)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    prices = synthetic_prices(args.size)
+    sentiments = synthetic_sentiments(args.size)
+
+    report("prices rows", lambda: rows_prices(prices), args.repeat)
+    report("prices columnar", lambda: columnar_prices(prices), args.repeat)
+    report("sentiments rows", lambda: rows_sentiments(sentiments), args.repeat)
+    report("sentiments columnar", lambda: columnar_sentiments(sentiments), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures /health latency while /analyze is under load.
+
+Run against a live server, once on a build with inference on the event loop and
+once with the executor, and compare the percentiles:
+
+    python3 bench_event_loop.py --url http://localhost:8000 --concurrency 16 --seconds 20
+
+Every /analyze posts a different tweet (a request number is appended), so each
+one misses the prediction cache and runs the model.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+import httpx
+import numpy as np
+
+SAMPLE_TWEET = {
+    "tweet": "Bitcoin is on fire! It's going to the moon!",
+    "followC": 1200,
+    "likeC": 450,
+    "viewC": 5000,
+    "date": "2025-02-08T14:30:00Z",
+    "coinType": ["Bitcoin", "BTC"]
+}
+
+
+# Shared by all load tasks so no two requests send the same text
+request_numbers = itertools.count()
+
+
+async def analyze_load(client: httpx.AsyncClient, url: str, stop_at: float, counter: list):
+    while time.perf_counter() < stop_at:
+        tweet = {**SAMPLE_TWEET, "tweet": f"{SAMPLE_TWEET['tweet']} #{next(request_numbers)}"}
+        await client.post(f"{url}/analyze", json=tweet)
+        counter[0] += 1
+
+
+async def probe_health(client: httpx.AsyncClient, url: str, stop_at: float, interval: float) -> list:
+    latencies = []
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        await client.get(f"{url}/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(url: str, concurrency: int, seconds: float, interval: float):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        baseline = await probe_health(client, url, time.perf_counter() + 2, interval)
+
+        stop_at = time.perf_counter() + seconds
+        counter = [0]
+        load = [analyze_load(client, url, stop_at, counter) for _ in range(concurrency)]
+        results = await asyncio.gather(probe_health(client, url, stop_at, interval), *load)
+        loaded = results[0]
+
+    for label, latencies in (("idle", baseline), (f"/analyze x{concurrency}", loaded)):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"/health {label:>16}: n={len(latencies):5d}  p50={p50:8.2f}ms  "
+              f"p95={p95:8.2f}ms  p99={p99:8.2f}ms  max={max(latencies):8.2f}ms")
+    print(f"/analyze throughput: {counter[0] / seconds:.1f} tweets/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="pause between /health probes (s)")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.seconds, args.interval))
@@ -0,0 +1,87 @@
+"""
+Per-call latency of a new httpx.AsyncClient per request versus the shared pooled client.
+
+Starts a local keep-alive stub that serves a CoinPaprika-shaped payload, so only
+client-side connection handling differs between the two runs. Against the real
+API the gap is larger, since every fresh client also pays a TLS handshake.
+
+    python3 bench_http_client.py --calls 500
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from http_client import create_http_client, get_with_retry
+
+PAYLOAD = json.dumps([
+    {"timestamp": f"2025-02-08T{hour:02d}:00:00Z", "price": 96000.0 + hour, "volume_24h": 1, "market_cap": 1}
+    for hour in range(24)
+]).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY a
+    # keep-alive client waits on delayed ACKs and the stub dominates the timing
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def per_call_client(url: str, calls: int) -> list:
+    import httpx
+
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            (await client.get(url)).json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def shared_client(url: str, calls: int) -> list:
+    latencies = []
+    client = create_http_client()
+    try:
+        for _ in range(calls):
+            start = time.perf_counter()
+            (await get_with_retry(client, url)).json()
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        await client.aclose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/tickers/btc-bitcoin/historical"
+
+    for label, run in (("new client per call", per_call_client), ("shared pooled client", shared_client)):
+        latencies = asyncio.run(run(url, args.calls))
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(f"{label:<22} mean={np.mean(latencies):6.2f}ms  p50={p50:6.2f}ms  p99={p99:6.2f}ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
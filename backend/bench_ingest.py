@@ -0,0 +1,99 @@
+"""
+Ingest throughput and per-tweet latency of the persistence step behind /analyze:
+a synchronous insert_one per tweet versus the write-behind buffer (WAL group
+commit, batched insert_many). The model is left out so only the write path is
+measured. Uses MONGO_URI / DB_NAME from .env and a scratch collection.
+
+    python3 bench_ingest.py --tweets 20000 --concurrency 64
+    python3 bench_ingest.py --wal-only      # no Mongo: WAL group-commit cost alone
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from write_behind import WriteAheadLog, WriteBehindBuffer
+
+
+class DiscardingCollection:
+    async def insert_many(self, documents, ordered=True):
+        pass
+
+
+def make_document(n: int):
+    return {
+        "type": "Bullish", "coefficient": 0.9, "followC": n, "likeC": 2, "viewC": 3,
+        "date": datetime.now(timezone.utc), "coinType": ["Bitcoin", "BTC"],
+    }
+
+
+async def drive(write, tweets: int, concurrency: int):
+    latencies = []
+    counter = iter(range(tweets))
+
+    async def client():
+        for n in counter:
+            start = time.perf_counter()
+            await write(make_document(n))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_sync(collection, tweets: int, concurrency: int):
+    return await drive(collection.insert_one, tweets, concurrency)
+
+
+async def run_write_behind(collection, tweets: int, concurrency: int, fsync: bool):
+    buffer = WriteBehindBuffer(collection, WriteAheadLog(tempfile.mkdtemp(), fsync=fsync))
+    buffer.start()
+
+    async def write(document):
+        document["_id"] = ObjectId()
+        await buffer.submit([document])
+
+    latencies, elapsed = await drive(write, tweets, concurrency)
+    drain_start = time.perf_counter()
+    await buffer.stop()
+    print(f"  ({buffer.group_commits} group commits, final flush {time.perf_counter() - drain_start:.2f}s)")
+    return latencies, elapsed
+
+
+def report(label: str, latencies, elapsed: float):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:<26} {len(latencies) / elapsed:9.0f} tweets/s  p50={p50:7.2f}ms  p99={p99:7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tweets", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--wal-only", action="store_true", help="discard flushed documents instead of using Mongo")
+    args = parser.parse_args()
+
+    if args.wal_only:
+        collection = DiscardingCollection()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        load_dotenv()
+        collection = AsyncIOMotorClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]["bench_ingest"]
+        await collection.drop()
+        report("insert_one per tweet", *await run_sync(collection, args.tweets, args.concurrency))
+        await collection.drop()
+
+    for fsync in (True, False):
+        label = f"write-behind (fsync={'on' if fsync else 'off'})"
+        report(label, *await run_write_behind(collection, args.tweets, args.concurrency, fsync))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Reports the token-count histogram of a tweet corpus and the speedup of
+length-bucketed dynamic padding over padding='max_length'.
+
+Padded-token totals are the FLOP proxy: a forward pass costs roughly
+batch_size x padded_length, so fewer padded tokens means less work per tweet.
+
+    python3 bench_padding.py --corpus ../webscraper/results.txt --tweets 2000
+"""
+import argparse
+import time
+
+from transformers import TextClassificationPipeline
+
+from bench_backends import load_corpus
+from inference import length_bucketed, pipeline_predictor
+from model_backends import MAX_LENGTH, load_torch_pipeline, token_counter
+
+
+def padded_tokens(lengths: list, batch_size: int, boundaries: list) -> int:
+    """Tokens actually pushed through the model when each bucketed batch pads to its longest item"""
+    total = 0
+    for start in range(0, len(lengths), batch_size):
+        buckets = {}
+        for length in lengths[start:start + batch_size]:
+            bucket = next((b for b in boundaries if length <= b), MAX_LENGTH)
+            buckets.setdefault(bucket, []).append(length)
+        total += sum(max(group) * len(group) for group in buckets.values())
+    return total
+
+
+def time_predictor(predict, corpus: list, batch_size: int) -> float:
+    predict(corpus[:batch_size])
+    start = time.perf_counter()
+    for i in range(0, len(corpus), batch_size):
+        predict(corpus[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="../webscraper/results.txt")
+    parser.add_argument("--tweets", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--buckets", default="16,32,64")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.tweets)
+    boundaries = sorted(int(b) for b in args.buckets.split(","))
+
+    pipe = load_torch_pipeline()
+    count = token_counter(pipe.tokenizer)
+    lengths = count(corpus)
+
+    print("token-count histogram")
+    for low in range(0, MAX_LENGTH, 8):
+        n = sum(low < length <= low + 8 for length in lengths)
+        print(f"  {low + 1:3d}-{low + 8:3d} | {n:6d} {'#' * int(60 * n / len(lengths))}")
+
+    fixed = MAX_LENGTH * len(lengths)
+    dynamic = padded_tokens(lengths, args.batch_size, [MAX_LENGTH])
+    bucketed = padded_tokens(lengths, args.batch_size, boundaries)
+    print(f"padded tokens  max_length={fixed}  longest-in-batch={dynamic}  bucketed={bucketed} "
+          f"({fixed / bucketed:.2f}x fewer)")
+
+    padded_pipe = TextClassificationPipeline(model=pipe.model, tokenizer=pipe.tokenizer,
+                                             max_length=MAX_LENGTH, truncation=True, padding='max_length')
+    baseline = time_predictor(pipeline_predictor(padded_pipe), corpus, args.batch_size)
+    improved = time_predictor(length_bucketed(pipeline_predictor(pipe), count, boundaries),
+                              corpus, args.batch_size)
+    print(f"max_length padding: {len(corpus) / baseline:8.1f} tweets/s")
+    print(f"bucketed dynamic:   {len(corpus) / improved:8.1f} tweets/s  ({baseline / improved:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Boot time and per-worker memory for a multi-worker server command.
+
+Launches the command, waits until GET /stats has answered from the expected
+number of distinct worker pids, then reads RSS and PSS for every process in the
+tree from /proc/<pid>/smaps_rollup (Linux only). PSS splits shared pages
+between the processes mapping them, so its total is the real memory cost.
+
+    python3 bench_prefork.py --workers 4 -- uvicorn main:app --port 8000 --workers 4
+    python3 bench_prefork.py --workers 4 -- python3 serve.py --port 8000 --workers 4
+"""
+import argparse
+import os
+import signal
+import subprocess
+import time
+
+import httpx
+
+
+def child_pids(pid: int) -> list:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def process_tree(root: int) -> list:
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(child_pids(pid))
+    return pids
+
+
+def memory_kb(pid: int) -> dict:
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key] = int(value.split()[0])
+    return usage
+
+
+def wait_for_workers(url: str, workers: int, timeout: float) -> set:
+    seen = set()
+    deadline = time.perf_counter() + timeout
+    while len(seen) < workers and time.perf_counter() < deadline:
+        try:
+            # Fresh connection each time so the kernel can hand it to any worker
+            seen.add(httpx.get(f"{url}/stats", timeout=2).json()["worker"]["pid"])
+        except (httpx.HTTPError, KeyError, ValueError):
+            time.sleep(0.2)
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--workers", type=int, required=True)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+
+    start = time.perf_counter()
+    server = subprocess.Popen(command)
+    try:
+        seen = wait_for_workers(args.url, args.workers, args.timeout)
+        boot = time.perf_counter() - start
+        print(f"boot time: {boot:.1f}s ({len(seen)}/{args.workers} workers answered)")
+
+        total_rss = total_pss = 0
+        print(f"{'pid':>8} {'role':<8} {'RSS MB':>10} {'PSS MB':>10}")
+        for pid in process_tree(server.pid):
+            usage = memory_kb(pid)
+            role = "worker" if pid in seen else "parent" if pid == server.pid else "other"
+            total_rss += usage["Rss"]
+            total_pss += usage["Pss"]
+            print(f"{pid:>8} {role:<8} {usage['Rss'] / 1024:10.0f} {usage['Pss'] / 1024:10.0f}")
+        print(f"{'total':>8} {'':<8} {total_rss / 1024:10.0f} {total_pss / 1024:10.0f}")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
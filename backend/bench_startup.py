@@ -0,0 +1,86 @@
+"""
+Cold-start time and resident memory of the API in each API_ROLE.
+
+Every run boots a fresh `uvicorn main:app` subprocess and times it until
+/ready succeeds, i.e. Mongo answers and (in the inference role) the model is
+loaded and warmed up. RSS is read from /proc (Linux) at that point, so it is
+the idle footprint before any traffic. Mongo settings come from the
+environment / .env as usual; `--probe /health` times liveness instead.
+
+    python3 bench_startup.py --runs 5
+    python3 bench_startup.py --roles read --runs 10
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def proc_status(pid: int) -> dict:
+    """VmRSS / VmHWM of a process in MiB"""
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "VmHWM"):
+                fields[name] = int(value.split()[0]) / 1024
+    return fields
+
+
+def boot(role: str, probe: str, timeout: float) -> dict:
+    port = free_port()
+    env = {**os.environ, "API_ROLE": role}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"{role} server exited with status {server.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"{role} server did not answer {probe} within {timeout}s")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{probe}", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                time.sleep(0.02)
+        seconds = time.perf_counter() - start
+        memory = proc_status(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"seconds": seconds, "rss_mb": memory["VmRSS"], "peak_rss_mb": memory["VmHWM"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", default="read,inference")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--probe", default="/ready")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    for role in args.roles.split(","):
+        runs = [boot(role, args.probe, args.timeout) for _ in range(args.runs)]
+        seconds = [run["seconds"] for run in runs]
+        print(f"{role:<10} ready in p50={np.median(seconds):6.2f}s  max={max(seconds):6.2f}s  "
+              f"rss={np.median([run['rss_mb'] for run in runs]):7.1f}MiB  "
+              f"peak={np.median([run['peak_rss_mb'] for run in runs]):7.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Exports the sentiment collection through /sentiments/stream and through
+cursor-paged /sentiments, reporting rows/s and the server's resident memory.
+
+Seed a local mongod first (uses MONGO_URI / DB_NAME / COLLECTION_NAME from .env):
+
+    python3 bench_stream.py --seed 1000000
+    python3 bench_stream.py --server-pid $(pgrep -f "uvicorn main:app")
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+COINS = [["Solana", "SOL"], ["Pepe", "PEPE"], ["Bitcoin", "BTC"],
+         ["Official Trump", "TRUMP"], ["Dogecoin", "DOGE"], ["Shiba Inu", "SHIB"]]
+LABELS = ["Bullish", "Bearish", "Neutral"]
+
+
+def seed(count: int, chunk: int = 10000):
+    load_dotenv()
+    collection = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")][os.getenv("COLLECTION_NAME")]
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, chunk):
+        collection.insert_many([{
+            "type": random.choice(LABELS),
+            "coefficient": random.random(),
+            "followC": random.randint(0, 100000),
+            "likeC": random.randint(0, 10000),
+            "viewC": random.randint(0, 1000000),
+            "date": now - timedelta(seconds=random.randint(0, 365 * 86400)),
+            "coinType": random.choice(COINS),
+        } for _ in range(min(chunk, count - start))], ordered=False)
+    print(f"seeded {count} documents")
+
+
+class RssSampler(threading.Thread):
+    """Polls VmRSS of the server process and keeps the peak"""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_kb = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        self.peak_kb = max(self.peak_kb, int(line.split()[1]))
+            time.sleep(0.05)
+
+
+def measure(label: str, export, server_pid: int):
+    sampler = RssSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    rows, size = export()
+    elapsed = time.perf_counter() - start
+    peak = f"  server peak RSS {sampler.peak_kb / 1024:.0f} MB" if sampler else ""
+    if sampler:
+        sampler.running = False
+    print(f"{label:<22} {rows:>9} rows  {elapsed:7.1f}s  {rows / elapsed:9.0f} rows/s  "
+          f"{size / 1e6:8.1f} MB{peak}")
+
+
+def export_stream(url: str):
+    rows = size = 0
+    with httpx.stream("GET", f"{url}/sentiments/stream", timeout=None) as response:
+        for line in response.iter_lines():
+            if line:
+                rows += 1
+                size += len(line) + 1
+    return rows, size
+
+
+def export_pages(url: str, page_size: int = 1000):
+    rows = size = 0
+    cursor = None
+    with httpx.Client(timeout=None) as client:
+        while True:
+            params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+            response = client.get(f"{url}/sentiments", params=params)
+            rows += len(response.json())
+            size += len(response.content)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return rows, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic documents and exit")
+    parser.add_argument("--server-pid", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+        return
+
+    measure("/sentiments/stream", lambda: export_stream(args.url), args.server_pid)
+    measure("/sentiments (paged)", lambda: export_pages(args.url), args.server_pid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class Subscription:
+    """One live client: a bounded queue of (event id, payload) and its coin filter"""
+
+    def __init__(self, coins: Optional[Set[str]], maxsize: int):
+        self.coins = coins
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def wants(self, coins: Iterable[str]) -> bool:
+        return self.coins is None or not self.coins.isdisjoint(coins)
+
+
+class BroadcastHub:
+    """
+    Fans new sentiments out to live subscribers.
+
+    Each event is serialized once by the publisher and handed to every matching
+    subscriber without waiting. A subscriber whose queue is full is dropped
+    rather than slowing the publisher or growing without bound; it drains what
+    it already has and then reconnects.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, coins: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(set(coins) if coins else None, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event_id: str, coins: List[str], payload: str):
+        self.published += 1
+        for subscription in list(self.subscribers):
+            if not subscription.wants(coins):
+                continue
+            try:
+                subscription.queue.put_nowait((event_id, payload))
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                self.subscribers.discard(subscription)
+                self.dropped += 1
+
+    def stats(self) -> Dict:
+        return {"subscribers": len(self.subscribers), "published": self.published, "dropped": self.dropped}
@@ -0,0 +1,42 @@
+"""
+Columnar response bodies: one array per field instead of one object per row.
+
+Field names appear once, timestamps are epoch milliseconds rather than
+formatted strings. Endpoints return these through ORJSONResponse, skipping
+response-model validation and the stdlib encoder.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Union
+
+# Accepted values of the `format` query parameter
+FORMAT_PATTERN = "^(rows|columnar)$"
+
+
+def epoch_ms(moment: Union[datetime, str]) -> int:
+    """Naive values are UTC; ISO strings are sentiment dates not yet converted by migrate_dates.py"""
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def price_columns(entries: List[Dict]) -> Dict[str, List]:
+    return {
+        "t": [epoch_ms(entry["timestamp"]) for entry in entries],
+        "price": [entry["price"] for entry in entries],
+    }
+
+
+def sentiment_columns(documents: List[Dict]) -> Dict[str, List]:
+    return {
+        "_id": [str(document["_id"]) for document in documents],
+        "t": [epoch_ms(document["date"]) for document in documents],
+        "type": [document["type"] for document in documents],
+        "coefficient": [document["coefficient"] for document in documents],
+        "followC": [document["followC"] for document in documents],
+        "likeC": [document["likeC"] for document in documents],
+        "viewC": [document["viewC"] for document in documents],
+        "coinType": [document["coinType"] for document in documents],
+    }
+
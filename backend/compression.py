@@ -0,0 +1,130 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli when the optional
+brotli package is installed and the client accepts it, gzip otherwise.
+
+Small bodies are sent as-is. Streamed bodies are compressed chunk by chunk and
+flushed after every chunk, so NDJSON and event streams still arrive as they
+are produced.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """{coding: q} from an Accept-Encoding header"""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(header: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    accepted = parse_accept_encoding(header)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    ranked = [coding for coding in candidates if accepted.get(coding, accepted.get("*", 0)) > 0]
+    if not ranked:
+        return None
+    # Highest q wins; ties go to the earlier (smaller) coding
+    return max(ranked, key=lambda coding: accepted.get(coding, accepted.get("*", 0)))
+
+
+class Compressor:
+    """Incremental br/gzip encoder with per-chunk flushes"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self.encoder = brotli.Compressor(quality=brotli_quality)
+        else:
+            self.encoder = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.encoder.process(data) + self.encoder.flush()
+        return self.encoder.compress(data) + self.encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self.encoder.process(data) + self.encoder.finish()
+        return self.encoder.compress(data) + self.encoder.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if "content-encoding" in headers or (len(body) < self.minimum_size and not more_body):
+                    passthrough = True
+                else:
+                    compressor = Compressor(encoding, self.gzip_level, self.brotli_quality)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                    if not more_body:
+                        body = compressor.finish(body)
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                        compressor = None
+                await send(start_message)
+                start_message = None
+                if passthrough or compressor is None:
+                    await send(message)
+                    return
+
+            if passthrough:
+                await send(message)
+                return
+            body = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,58 @@
+"""
+Per-coin overview rows for /dashboard: latest price, change over the window and
+PricePredictionEngine ranges driven by the rollup sentiment summary.
+"""
+from typing import Dict, List, Optional
+
+from price_prediction import PricePredictionEngine
+
+
+def sentiment_signal(series: Optional[Dict]) -> Dict:
+    """
+    Net sentiment in [-1, 1] from a summary series: (bullish - bearish) / tweets,
+    plus the same measure over the most recent bucket as the trend.
+    """
+    if not series or not sum(series["count"]):
+        return {"average_sentiment": 0.0, "trend_strength": 0.0, "tweets": 0}
+    count = sum(series["count"])
+    net = sum(series["bullish"]) - sum(series["bearish"])
+    last = series["count"][-1]
+    trend = (series["bullish"][-1] - series["bearish"][-1]) / last if last else 0.0
+    return {"average_sentiment": net / count, "trend_strength": trend, "tweets": count}
+
+
+def predictions_dict(predictions) -> Dict[str, Dict]:
+    return {
+        timeframe: {
+            "min_price": float(prediction.price_range.min_price),
+            "max_price": float(prediction.price_range.max_price),
+            "confidence": float(prediction.price_range.confidence),
+        }
+        for timeframe, prediction in predictions.items()
+    }
+
+
+def coin_overview(ticker: str, entries: List[Dict], series: Optional[Dict],
+                  engine: PricePredictionEngine) -> Optional[Dict]:
+    """Table row for one coin, or None when there is no price data"""
+    if not entries:
+        return None
+    prices = [entry["price"] for entry in entries]
+    current, first = prices[-1], prices[0]
+    signal = sentiment_signal(series)
+
+    # CoinPaprika history carries no usable volume here, so volume impact
+    # reduces to sentiment strength (current == average volume)
+    predictions = engine.predict_price_range(
+        current_price=current,
+        sentiment_data=signal,
+        market_data={"historical_prices": prices, "current_volume": 1.0, "average_volume": 1.0}
+    )
+    return {
+        "id": ticker,
+        "valuation": current,
+        "delta": (current - first) / first * 100 if first else 0.0,
+        "confidence": float(predictions["1d"].price_range.confidence) * 100,
+        "sentiment": signal,
+        "predictions": predictions_dict(predictions),
+    }
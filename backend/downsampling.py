@@ -0,0 +1,44 @@
+"""
+Largest-Triangle-Three-Buckets downsampling for chart series.
+
+The first and last points are kept; the rest of the series is split into
+`threshold - 2` equal buckets and from each bucket the point forming the
+largest triangle with the previously selected point and the next bucket's
+average is kept. Peaks and troughs survive, unlike plain decimation.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> np.ndarray:
+    """Indices of the (at most) `threshold` points to keep, in ascending order"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    # Bucket i covers [edges[i], edges[i + 1]) of the interior points
+    edges = (1 + np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64)
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+
+    # Averages of every bucket at once; the last "next bucket" is the final point
+    avg_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    # Each choice depends on the previous one, so only the per-bucket area is vectorized
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        px, py = x[prev], y[prev]
+        area = np.abs((px - avg_x[i + 1]) * (y[lo:hi] - py) - (px - x[lo:hi]) * (avg_y[i + 1] - py))
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
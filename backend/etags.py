@@ -0,0 +1,41 @@
+"""
+Weak ETags for conditional GETs.
+
+Tags are derived from the data version behind a response plus the request
+parameters, so a poll that matches can be answered with 304 before the body is
+queried or serialized. Prices are versioned by candle count and the newest
+candle's timestamp and price. Sentiments are versioned by the newest _id, or by
+the committed insert count (sequence.py) with SENTIMENT_SEQUENCE, because
+write-behind inserts documents out of _id order.
+They are weak because the compression middleware may re-encode the body.
+"""
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Response
+
+# Clients may cache but must revalidate every time
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def validator_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag))
@@ -0,0 +1,91 @@
+import asyncio
+import importlib.util
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Shared upstream rate limit: `rate` requests per second with bursts of up to
+    `capacity`. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+        self.throttled = 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                self.throttled += 1
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+def create_http_client(timeout: float = 10.0,
+                       connect_timeout: float = 5.0,
+                       max_connections: int = 20) -> httpx.AsyncClient:
+    """
+    Application-lifetime client: pooled keep-alive connections skip the TCP+TLS
+    handshake on every call. HTTP/2 is used when the optional h2 package is installed.
+    """
+    return httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0
+        )
+    )
+
+
+def retry_delay(response: Optional[httpx.Response], attempt: int,
+                backoff: float, max_backoff: float) -> float:
+    """Honor Retry-After when the upstream sends it, else exponential backoff with jitter"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), max_backoff)
+    return min(backoff * (2 ** attempt), max_backoff) * random.uniform(0.5, 1.0)
+
+
+async def get_with_retry(client: httpx.AsyncClient, url: str,
+                         params: Optional[Dict] = None,
+                         retries: int = 3,
+                         backoff: float = 0.5,
+                         max_backoff: float = 8.0,
+                         limiter: Optional[TokenBucket] = None) -> httpx.Response:
+    """GET that retries 429/5xx responses and transport errors; the last response is returned as-is"""
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            response = await client.get(url, params=params)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            response = None
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        await asyncio.sleep(retry_delay(response, attempt, backoff, max_backoff))
@@ -0,0 +1,285 @@
+import asyncio
+import math
+import os
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from metrics import DEPTH_BUCKETS, LATENCY_BUCKETS_MS, Histogram
+
+
+class InferenceQueueFull(Exception):
+    """A priority lane is at its depth limit; retry_after estimates seconds until it drains"""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"{lane} inference queue is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+# Priority order: a batch is filled from earlier lanes first
+LANES = ("interactive", "bulk")
+
+
+class MicroBatcher:
+    """Collects concurrent classification requests into batched model calls.
+
+    Requests wait at most ``max_wait_ms`` for companions; a batch is dispatched
+    as soon as ``max_batch_size`` texts are queued or the wait window closes.
+    Batches run on ``executor`` so the event loop keeps serving other requests,
+    with at most ``max_concurrent_batches`` in flight at once.
+
+    Requests queue in priority lanes (``LANES``): interactive texts always go
+    into the next batch ahead of bulk ones. A lane with a limit in
+    ``queue_limits`` rejects new texts with InferenceQueueFull once that many
+    are waiting, instead of letting latency grow without bound.
+    """
+
+    def __init__(self,
+                 predict_batch: Callable[[List[str]], List[Dict]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 10.0,
+                 executor: Optional[Executor] = None,
+                 max_concurrent_batches: int = 1,
+                 queue_limits: Optional[Dict[str, int]] = None):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.queue_limits = queue_limits or {}
+        self._lanes: Dict[str, Deque[Tuple[str, asyncio.Future, float]]] = {lane: deque() for lane in LANES}
+        self._ready: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = set()
+        # Smoothed forward-pass cost per text, for Retry-After estimates
+        self._seconds_per_text = 0.0
+        self.admitted = {lane: 0 for lane in LANES}
+        self.rejected = {lane: 0 for lane in LANES}
+        self.depth = {lane: Histogram(DEPTH_BUCKETS) for lane in LANES}
+        self.wait_ms = {lane: Histogram(LATENCY_BUCKETS_MS) for lane in LANES}
+
+    def start(self):
+        """Start the background batching loop on the running event loop"""
+        if self._worker is None:
+            self._ready = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any requests still queued"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        for lane in self._lanes.values():
+            while lane:
+                _, future, _ = lane.popleft()
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1"""
+        backlog = self.queued() * self._seconds_per_text / self.max_concurrent_batches
+        return max(1, math.ceil(backlog))
+
+    async def submit(self, text: str, priority: str = "interactive") -> Dict:
+        """Queue a single text in the given lane and wait for its prediction"""
+        if self._worker is None:
+            raise RuntimeError("Inference scheduler is not running")
+        lane = self._lanes[priority]
+        limit = self.queue_limits.get(priority)
+        if limit is not None and len(lane) >= limit:
+            self.rejected[priority] += 1
+            raise InferenceQueueFull(priority, self.retry_after())
+
+        self.depth[priority].observe(len(lane))
+        self.admitted[priority] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        lane.append((text, future, loop.time()))
+        self._ready.set()
+        return await future
+
+    def _pop(self) -> Optional[Tuple[str, asyncio.Future]]:
+        for priority, lane in self._lanes.items():
+            if lane:
+                text, future, enqueued = lane.popleft()
+                self.wait_ms[priority].observe((asyncio.get_running_loop().time() - enqueued) * 1000)
+                return text, future
+        return None
+
+    async def _next(self, timeout: Optional[float] = None) -> Tuple[str, asyncio.Future]:
+        """Highest-priority queued request, waiting up to ``timeout`` (forever if None)"""
+        while True:
+            item = self._pop()
+            if item is not None:
+                return item
+            self._ready.clear()
+            if timeout is None:
+                await self._ready.wait()
+            else:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for the first request, then gather more until size or time runs out"""
+        batch = [await self._next()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await self._next(remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run one batch on the executor and resolve its waiters"""
+        try:
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            texts = [text for text, _ in batch]
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                predictions = await loop.run_in_executor(
+                    self.executor, self.predict_batch, texts
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            per_text = (loop.time() - started) / len(texts)
+            self._seconds_per_text = per_text if not self._seconds_per_text else 0.8 * self._seconds_per_text + 0.2 * per_text
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            lane: {
+                "queued": len(self._lanes[lane]),
+                "limit": self.queue_limits.get(lane),
+                "admitted": self.admitted[lane],
+                "rejected": self.rejected[lane],
+                "depth_at_submit": self.depth[lane].snapshot(),
+                "wait_ms": self.wait_ms[lane].snapshot(),
+            }
+            for lane in LANES
+        }
+
+
+def pipeline_predictor(pipe) -> Callable[[List[str]], List[Dict]]:
+    """Wrap a TextClassificationPipeline so a whole batch runs in one forward pass"""
+    def predict_batch(texts: List[str]) -> List[Dict]:
+        return pipe(texts, batch_size=len(texts))
+    return predict_batch
+
+
+def length_bucketed(predict_batch: Callable[[List[str]], List[Dict]],
+                    token_lengths: Callable[[List[str]], List[int]],
+                    boundaries: List[int]) -> Callable[[List[str]], List[Dict]]:
+    """
+    Split each batch into length buckets before the forward pass.
+
+    With dynamic padding a batch is padded to its longest item, so one long tweet
+    makes every short tweet beside it pay for the full sequence. Grouping by
+    token count (e.g. boundaries [16, 32, 64]) keeps padding per bucket small.
+    Predictions are returned in the original order.
+    """
+    boundaries = sorted(boundaries)
+
+    def bucket_of(length: int) -> int:
+        for index, boundary in enumerate(boundaries):
+            if length <= boundary:
+                return index
+        return len(boundaries)
+
+    def predict(texts: List[str]) -> List[Dict]:
+        buckets: Dict[int, List[int]] = {}
+        for position, length in enumerate(token_lengths(texts)):
+            buckets.setdefault(bucket_of(length), []).append(position)
+
+        predictions: List[Optional[Dict]] = [None] * len(texts)
+        for bucket in sorted(buckets):
+            positions = buckets[bucket]
+            for position, prediction in zip(positions, predict_batch([texts[p] for p in positions])):
+                predictions[position] = prediction
+        return predictions
+
+    return predict
+
+
+WARMUP_TWEET = "$BTC breaking out again, next stop the moon"
+
+
+def warmup_batches(lengths: List[int], batch_size: int) -> List[List[str]]:
+    """
+    Synthetic tweets to run through the classifier before taking traffic: a full
+    batch at each token length, so every padded shape has been allocated once,
+    plus the single short tweet of a lone /analyze call.
+    """
+    words = WARMUP_TWEET.split()
+
+    def text(length: int) -> str:
+        # Two of the model's tokens are the start/end markers
+        return " ".join(words[i % len(words)] for i in range(max(1, length - 2)))
+
+    lengths = sorted(set(lengths))
+    batches = [[text(length)] * max(1, batch_size) for length in lengths]
+    batches.append([text(lengths[0])])
+    return batches
+
+
+def _configure_torch_threads(num_threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(num_threads)
+
+
+def create_inference_executor(workers: int = 1, threads_per_worker: Optional[int] = None) -> ThreadPoolExecutor:
+    """Create the thread pool that runs model forward passes off the event loop.
+
+    Torch releases the GIL inside its kernels, so a thread pool avoids copying the
+    model into worker processes. Cores are split evenly between workers via the
+    torch intra-op thread count.
+    """
+    workers = max(1, workers)
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    return ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix="inference",
+        initializer=_configure_torch_threads,
+        initargs=(threads_per_worker,)
+    )
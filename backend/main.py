@@ -1,23 +1,126 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime, timezone, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
-import httpx
 from dotenv import load_dotenv
-from transformers import TextClassificationPipeline, AutoModelForSequenceClassification, AutoTokenizer
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+import json
+import re
+import hashlib
+import asyncio
+import time
+from caching import SingleFlight, TTLCache
+from http_client import TokenBucket, create_http_client
+from price_service import COIN_IDS, COINPAPRIKA_TICKERS_URL, PriceHistoryService, UpstreamError
+from price_store import PriceStore
+from sentiment_queries import (
+    SENTIMENT_INDEXES,
+    SENTIMENT_PROJECTION,
+    SENTIMENT_SORT,
+    apply_cursor,
+    build_sentiment_filter,
+    next_cursor,
+)
+from rollups import ROLLUP_INDEX, apply_rollups, build_summary_pipeline, summary_window
+from sequence import SEQUENCE_INDEX, assign_sequence, data_version, mark_committed
+from columnar import FORMAT_PATTERN, price_columns, sentiment_columns
+from compression import CompressionMiddleware
+from dashboard import coin_overview
+from downsampling import lttb
+from etags import etag_matches, make_etag, not_modified, validator_headers
+from price_prediction import PricePredictionEngine
+from inference import (
+    InferenceQueueFull, MicroBatcher, create_inference_executor, length_bucketed, pipeline_predictor, warmup_batches
+)
+from write_behind import WriteAheadLog, WriteBehindBuffer, WriteBehindFull
+from broadcast import BroadcastHub
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+ROLLUP_COLLECTION_NAME = os.getenv("ROLLUP_COLLECTION_NAME", "sentiment_rollups")
+# Counter document behind the sentiment insert sequence and data version (see sequence.py)
+SEQUENCE_COLLECTION_NAME = os.getenv("SEQUENCE_COLLECTION_NAME", "sentiment_sequence")
+
+# "inference" loads the classifier and serves every endpoint; "read" replicas never
+# import transformers or torch and answer /analyze with 503
+API_ROLE = os.getenv("API_ROLE", "inference")
+API_ROLES = ("inference", "read")
+if API_ROLE not in API_ROLES:
+    raise ValueError(f"Unknown API_ROLE '{API_ROLE}', expected one of {API_ROLES}")
+
+# Shared upstream HTTP client: seconds before giving up on CoinPaprika, and retries on 429/5xx
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
 
-# CoinPaprika historical endpoint for BTC
-COINPAPRIKA_HISTORICAL_URL = "https://api.coinpaprika.com/v1/tickers/btc-bitcoin/historical"
+# Micro-batching window for /analyze: a batch is flushed at this many tweets or after this many ms
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+# Forward passes run on a dedicated thread pool; torch intra-op threads default to cores / workers
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or None
+# "torch" serves the fp32 PyTorch model, "onnx" an int8-quantized ONNX Runtime export cached in ONNX_MODEL_DIR
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_model")
+# Token-count boundaries for splitting each batch before dynamic padding; empty disables bucketing
+INFERENCE_LENGTH_BUCKETS = [int(b) for b in os.getenv("INFERENCE_LENGTH_BUCKETS", "16,32,64").split(",") if b.strip()]
+# Rounds of synthetic batches (one per length bucket) run through the model before /ready succeeds
+INFERENCE_WARMUP_ROUNDS = int(os.getenv("INFERENCE_WARMUP_ROUNDS", "1"))
+# Admission control: texts allowed to wait for the model per priority lane before new ones
+# are rejected (503 for interactive /analyze, 429 for bulk /analyze/batch); 0 = unbounded
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "256"))
+INFERENCE_BULK_QUEUE_DEPTH = int(os.getenv("INFERENCE_BULK_QUEUE_DEPTH", "2048"))
+# Upper bound on tweets accepted by a single /analyze/batch call
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "1000"))
+# Documents fetched per Motor round trip when streaming exports
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "2000"))
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Opt-in write-behind for /analyze: tweets are acknowledged once in the local WAL and
+# inserted into Mongo every WRITE_BEHIND_FLUSH_SIZE docs or WRITE_BEHIND_FLUSH_MS
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+WRITE_BEHIND_FLUSH_SIZE = int(os.getenv("WRITE_BEHIND_FLUSH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))
+WRITE_BEHIND_MAX_BUFFERED = int(os.getenv("WRITE_BEHIND_MAX_BUFFERED", "100000"))
+WAL_DIR = os.getenv("WAL_DIR", "wal")
+WAL_FSYNC = os.getenv("WAL_FSYNC", "1").lower() in ("1", "true", "yes")
+# Version /sentiments and number live events by an insert sequence (sequence.py) instead of
+# the newest _id, which write-behind inserts out of order. Costs two counter writes per
+# insert batch, so it defaults to on only with WRITE_BEHIND; read replicas serving a
+# write-behind deployment must set it too
+SENTIMENT_SEQUENCE = os.getenv("SENTIMENT_SEQUENCE", "1" if WRITE_BEHIND else "0").lower() in ("1", "true", "yes")
+# /sentiments/live: events buffered per client before it is dropped as too slow,
+# seconds between keep-alive comments, and how many missed events a reconnect replays
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "256"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_BACKFILL_LIMIT = int(os.getenv("LIVE_BACKFILL_LIMIT", "500"))
+# Feed live clients from a Mongo change stream (needs a replica set) instead of this
+# process's own inserts, so every worker sees every insert
+LIVE_CHANGE_STREAM = os.getenv("LIVE_CHANGE_STREAM", "0").lower() in ("1", "true", "yes")
+# Predictions cached by normalized tweet text, so copy-pasted tweets and retweets skip the model
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "10000"))
+SENTIMENT_CACHE_TTL = float(os.getenv("SENTIMENT_CACHE_TTL", "3600"))
+
+# Seconds /ready waits for a Mongo ping before reporting the replica not ready
+READY_MONGO_TIMEOUT = float(os.getenv("READY_MONGO_TIMEOUT", "2"))
+
+# CoinPaprika coin id served by /bitcoin-data
+BITCOIN_ID = COIN_IDS["BTC"]
+# Client-side limit shared by all CoinPaprika calls (requests/second and burst size)
+PAPRIKA_RATE_LIMIT = float(os.getenv("PAPRIKA_RATE_LIMIT", "10"))
+PAPRIKA_BURST = float(os.getenv("PAPRIKA_BURST", "10"))
+# Seconds past a candle boundary before a cached price window is refetched
+PRICE_CACHE_GRACE = float(os.getenv("PRICE_CACHE_GRACE", "60"))
+# SQLite file holding fetched candles; only missing ranges are requested upstream
+PRICE_DB_PATH = os.getenv("PRICE_DB_PATH", "prices.sqlite3")
 
 app = FastAPI(title="Crypto Sentiment API")
 
@@ -27,11 +130,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 
-client = AsyncIOMotorClient(MONGO_URI)
+# tz_aware so stored UTC dates are returned (and serialized) with their offset
+client = AsyncIOMotorClient(MONGO_URI, tz_aware=True)
 db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
+rollup_collection = db[ROLLUP_COLLECTION_NAME]
+sequence_collection = db[SEQUENCE_COLLECTION_NAME]
+
+http_client = None
+price_history = None
+write_behind = None
+pipe = None
+batcher = None
+inference_executor = None
+# "loading" until the classifier is loaded and warmed up, then "warm" (or "failed"); read replicas have none
+model_state = "loading" if API_ROLE == "inference" else "disabled"
+model_timings: Dict[str, float] = {}
+model_task = None
+sentiment_cache = TTLCache(maxsize=SENTIMENT_CACHE_SIZE, ttl=SENTIMENT_CACHE_TTL)
+sentiment_inflight = SingleFlight()
+prediction_engine = PricePredictionEngine()
+live_hub = BroadcastHub(queue_size=LIVE_QUEUE_SIZE)
+change_stream_task = None
 
 class TweetData(BaseModel):
     tweet: str
@@ -54,47 +178,438 @@ class SentimentData(BaseModel):
     class Config:
         json_encoders = {ObjectId: str}
 
+def preload_classifier():
+    """
+    Load the classifier into this process unless already loaded (or running as a read replica).
+    serve.py calls this before forking so workers share the weights copy-on-write.
+    """
+    global pipe
+    if pipe is None and API_ROLE == "inference":
+        # Imported here so read replicas never pay for transformers and torch
+        from model_backends import load_classifier
+        pipe = load_classifier(INFERENCE_BACKEND, ONNX_MODEL_DIR, INFERENCE_THREADS)
+    return pipe
+
+def build_predictor():
+    """Blocking: import the backend, load the classifier and wrap it for batched calls"""
+    from model_backends import MAX_LENGTH, token_counter
+    preload_classifier()
+    predict_batch = pipeline_predictor(pipe)
+    if INFERENCE_LENGTH_BUCKETS:
+        predict_batch = length_bucketed(predict_batch, token_counter(pipe.tokenizer), INFERENCE_LENGTH_BUCKETS)
+    return predict_batch, INFERENCE_LENGTH_BUCKETS + [MAX_LENGTH]
+
+async def prepare_model():
+    """
+    Load and warm up the classifier off the event loop. Warm-up batches go through
+    the batcher on the inference threads, so the first real request finds kernels
+    chosen and buffers allocated; /analyze is only admitted once this finishes.
+    """
+    global batcher, inference_executor, model_state
+    loop = asyncio.get_running_loop()
+    try:
+        started = time.perf_counter()
+        predict_batch, warmup_lengths = await loop.run_in_executor(None, build_predictor)
+        model_timings["load_seconds"] = round(time.perf_counter() - started, 3)
+
+        inference_executor = create_inference_executor(INFERENCE_WORKERS, INFERENCE_THREADS)
+        warming = MicroBatcher(
+            predict_batch,
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+            executor=inference_executor,
+            max_concurrent_batches=INFERENCE_WORKERS,
+            queue_limits={
+                lane: depth for lane, depth in
+                (("interactive", INFERENCE_QUEUE_DEPTH), ("bulk", INFERENCE_BULK_QUEUE_DEPTH)) if depth > 0
+            }
+        )
+        warming.start()
+        started = time.perf_counter()
+        for _ in range(INFERENCE_WARMUP_ROUNDS):
+            for texts in warmup_batches(warmup_lengths, INFERENCE_MAX_BATCH_SIZE):
+                if INFERENCE_BULK_QUEUE_DEPTH > 0:
+                    texts = texts[:INFERENCE_BULK_QUEUE_DEPTH]
+                await asyncio.gather(*(warming.submit(text, "bulk") for text in texts))
+        model_timings["warmup_seconds"] = round(time.perf_counter() - started, 3)
+        batcher = warming
+        model_state = "warm"
+        print(f"[INFO] Model loaded in {model_timings['load_seconds']}s "
+              f"and warmed up in {model_timings['warmup_seconds']}s")
+    except Exception as e:
+        model_state = "failed"
+        print("[ERROR] Model loading failed:", str(e))
+
 @app.on_event("startup")
 async def load_model():
-    global pipe
+    global model_task
+    if API_ROLE != "inference":
+        return
+    # Not awaited: Mongo setup and the other startup hooks run while the model loads,
+    # and /ready reports the replica ready only once it is warm
+    model_task = asyncio.get_running_loop().create_task(prepare_model())
+
+@app.on_event("startup")
+async def open_http_client():
+    global http_client, price_history
+    http_client = create_http_client(timeout=HTTP_TIMEOUT)
+    price_history = PriceHistoryService(
+        http_client,
+        base_url=COINPAPRIKA_TICKERS_URL,
+        retries=HTTP_RETRIES,
+        grace_seconds=PRICE_CACHE_GRACE,
+        store=PriceStore(PRICE_DB_PATH),
+        limiter=TokenBucket(PAPRIKA_RATE_LIMIT, PAPRIKA_BURST)
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    if http_client is not None:
+        await http_client.aclose()
+    if price_history is not None and price_history.store is not None:
+        price_history.store.close()
+
+@app.on_event("startup")
+async def create_indexes():
     try:
-        tokenizer = AutoTokenizer.from_pretrained("ElKulako/cryptobert", use_fast=True)
-        model = AutoModelForSequenceClassification.from_pretrained("ElKulako/cryptobert", num_labels=3)
-        pipe = TextClassificationPipeline(
-            model=model,
-            tokenizer=tokenizer,
-            max_length=64,
-            truncation=True,
-            padding='max_length'
+        for keys in SENTIMENT_INDEXES:
+            await collection.create_index(keys)
+        if SENTIMENT_SEQUENCE:
+            await collection.create_index(SEQUENCE_INDEX)
+        await rollup_collection.create_index(ROLLUP_INDEX, unique=True)
+    except Exception as e:
+        print("[WARN] Could not create sentiment indexes:", str(e))
+
+@app.on_event("startup")
+async def start_write_behind():
+    global write_behind
+    if WRITE_BEHIND:
+        write_behind = WriteBehindBuffer(
+            collection,
+            WriteAheadLog.claim(WAL_DIR, fsync=WAL_FSYNC),
+            flush_size=WRITE_BEHIND_FLUSH_SIZE,
+            flush_interval_ms=WRITE_BEHIND_FLUSH_MS,
+            max_buffered=WRITE_BEHIND_MAX_BUFFERED,
+            on_flush=on_inserted,
+            before_insert=stamp_sequence if SENTIMENT_SEQUENCE else None
         )
+        write_behind.start()
+        if write_behind.replayed:
+            print(f"[INFO] Replaying {write_behind.replayed} tweets from the write-ahead log")
+
+async def watch_inserts():
+    """Publish every insert on the collection, from any process, to this worker's live clients"""
+    resume_token = None
+    while True:
+        try:
+            async with collection.watch([{"$match": {"operationType": "insert"}}],
+                                        resume_after=resume_token) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    publish_live([change["fullDocument"]])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("[WARN] Sentiment change stream failed, retrying:", str(e))
+            await asyncio.sleep(5)
+
+@app.on_event("startup")
+async def start_change_stream():
+    global change_stream_task
+    if LIVE_CHANGE_STREAM:
+        change_stream_task = asyncio.get_running_loop().create_task(watch_inserts())
+
+@app.on_event("shutdown")
+async def stop_change_stream():
+    if change_stream_task is not None:
+        change_stream_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_write_behind():
+    if write_behind is not None:
+        await write_behind.stop()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if model_task is not None and not model_task.done():
+        model_task.cancel()
+    if batcher is not None:
+        await batcher.stop()
+    if inference_executor is not None:
+        inference_executor.shutdown(wait=False)
+
+RETWEET_PREFIX = re.compile(r"^RT @\w+:\s*")
+
+def sentiment_cache_key(text: str) -> str:
+    """Hash of the tweet with the retweet prefix dropped and whitespace collapsed"""
+    normalized = " ".join(RETWEET_PREFIX.sub("", text.strip()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+async def classify_tweet(text: str, priority: str = "interactive") -> Dict:
+    """
+    Cached classification: identical texts are served from the cache, and
+    concurrent identical texts in the same priority lane share a single model
+    call. Lanes don't share calls, so an interactive request never waits in
+    (or is rejected by) the bulk lane.
+    """
+    key = sentiment_cache_key(text)
+    prediction = sentiment_cache.get(key)
+    if prediction is not None:
+        return prediction
+
+    async def infer():
+        result = await batcher.submit(text, priority)
+        sentiment_cache.set(key, result)
+        return result
+
+    return await sentiment_inflight.do((key, priority), infer)
+
+async def update_rollups(documents: List[Dict]):
+    """
+    Rollups are derived data: a failed increment is logged rather than failing
+    the request, and `python3 rollups.py rebuild` repairs any drift.
+    """
+    try:
+        await apply_rollups(rollup_collection, documents)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Model loading failed: {str(e)}")
+        print("[WARN] Could not update sentiment rollups:", str(e))
+
+# Live event ids: the insert sequence, or the _id when inserts happen in _id order
+LIVE_EVENT_FIELD = "seq" if SENTIMENT_SEQUENCE else "_id"
+
+def parse_event_id(value: Optional[str]):
+    """A Last-Event-ID this server issued, or None for anything else (e.g. from the other mode)"""
+    if not value:
+        return None
+    if SENTIMENT_SEQUENCE:
+        return int(value) if value.isdigit() else None
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+def publish_live(documents: List[Dict]):
+    for document in documents:
+        payload = json.dumps({field: document[field] for field in SENTIMENT_PROJECTION}, default=_json_default)
+        live_hub.publish(str(document[LIVE_EVENT_FIELD]), document["coinType"], payload)
+
+async def stamp_sequence(documents: List[Dict]):
+    """Called right before every insert, including each write-behind flush attempt"""
+    if SENTIMENT_SEQUENCE:
+        await assign_sequence(sequence_collection, documents)
+
+async def sentiment_version():
+    """Data version for conditional GETs: the committed count, or the newest _id"""
+    if SENTIMENT_SEQUENCE:
+        return await data_version(sequence_collection)
+    latest = await collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return latest["_id"] if latest else None
+
+async def on_inserted(documents: List[Dict]):
+    """Everything derived from newly stored sentiments: data version, rollups and live clients"""
+    if SENTIMENT_SEQUENCE:
+        try:
+            await mark_committed(sequence_collection, len(documents))
+        except Exception as e:
+            print("[WARN] Could not bump the sentiment data version:", str(e))
+    await update_rollups(documents)
+    if not LIVE_CHANGE_STREAM:
+        publish_live(documents)
+
+def build_sentiment_document(data: TweetData, prediction: Dict) -> Dict:
+    return {
+        "type": prediction["label"],
+        "coefficient": float(prediction["score"]),
+        "followC": data.followC,
+        "likeC": data.likeC,
+        "viewC": data.viewC,
+        "date": data.date.astimezone(timezone.utc),
+        "coinType": data.coinType
+    }
+
+def require_inference():
+    if batcher is not None:
+        return
+    if API_ROLE != "inference":
+        raise HTTPException(status_code=503, detail=f"Tweet analysis is not served by this replica (API_ROLE={API_ROLE})")
+    raise HTTPException(status_code=503, detail=f"Sentiment model is {model_state}", headers={"Retry-After": "5"})
+
+def queue_full_error(e: InferenceQueueFull) -> HTTPException:
+    # Bulk callers are told to slow down; a full interactive lane means the service is overloaded
+    status_code = 429 if e.lane == "bulk" else 503
+    return HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def buffer_documents(documents: List[Dict]):
+    """Write-behind mode: durable in the WAL on return, in Mongo (and rollups) after the next flush"""
+    try:
+        await write_behind.submit(documents)
+    except WriteBehindFull as e:
+        raise HTTPException(status_code=503, detail=f"Write buffer full: {str(e)}", headers={"Retry-After": "1"})
 
 @app.post("/analyze", response_model=dict)
-async def analyze_tweet(data: TweetData):
+async def analyze_tweet(data: TweetData, request: Request):
+    """Scores and stores one tweet. Crawlers backfilling history send X-Priority: bulk."""
+    require_inference()
+    priority = "bulk" if request.headers.get("X-Priority", "").lower() == "bulk" else "interactive"
     try:
-        prediction = pipe(data.tweet)[0]
-        sentiment_data = {
-            "type": prediction["label"],
-            "coefficient": float(prediction["score"]),
-            "followC": data.followC,
-            "likeC": data.likeC,
-            "viewC": data.viewC,
-            "date": data.date.astimezone(timezone.utc).isoformat(),
-            "coinType": data.coinType
-        }
-        result = await collection.insert_one(sentiment_data)
-        sentiment_data["_id"] = str(result.inserted_id)
-        return {"message": "Sentiment data saved successfully", "data": sentiment_data}
+        prediction = await classify_tweet(data.tweet, priority)
+        sentiment_data = build_sentiment_document(data, prediction)
+        if write_behind is not None:
+            sentiment_data["_id"] = ObjectId()
+            await buffer_documents([sentiment_data])
+        else:
+            await stamp_sequence([sentiment_data])
+            await collection.insert_one(sentiment_data)
+            await on_inserted([sentiment_data])
+        # A copy: in write-behind mode the buffer still holds the document itself
+        saved = {**sentiment_data, "_id": str(sentiment_data["_id"])}
+        saved.pop("seq", None)
+        return {"message": "Sentiment data saved successfully", "data": saved}
+    except InferenceQueueFull as e:
+        raise queue_full_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing tweet: {str(e)}")
 
+def parse_tweet_batch(body: bytes, content_type: str) -> List:
+    """
+    Accepts a JSON array or NDJSON (one TweetData object per line).
+    Returns a list aligned with the input where each entry is either
+    a validated TweetData or an error string.
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        raw_items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                raw_items.append(json.loads(line))
+            except ValueError as e:
+                raw_items.append(e)
+    else:
+        raw_items = json.loads(body)
+        if not isinstance(raw_items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of tweets")
+
+    if len(raw_items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} tweets per batch")
+
+    items = []
+    for raw in raw_items:
+        if isinstance(raw, Exception):
+            items.append(f"Invalid JSON: {str(raw)}")
+            continue
+        try:
+            items.append(TweetData.model_validate(raw))
+        except ValidationError as e:
+            items.append(f"Invalid tweet: {e.errors()[0]['msg']}")
+    return items
+
+@app.post("/analyze/batch", response_model=dict)
+async def analyze_tweet_batch(request: Request):
+    """
+    Scores many tweets in one batched model call and persists them with a single
+    unordered insert_many. Body is a JSON array of TweetData, or NDJSON when sent
+    with Content-Type: application/x-ndjson. Runs in the bulk inference lane and
+    gets 429 with Retry-After while that lane is full.
+    Returns: { "inserted": n, "results": [ {index, _id} | {index, error}, ... ] }
+    """
+    require_inference()
+    try:
+        items = parse_tweet_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {str(e)}")
+
+    results = [{"index": i, "error": item} for i, item in enumerate(items) if isinstance(item, str)]
+    valid = [(i, item) for i, item in enumerate(items) if isinstance(item, TweetData)]
+    if not valid:
+        return {"message": "No valid tweets in batch", "inserted": 0, "results": results}
+
+    try:
+        predictions = await asyncio.gather(*(classify_tweet(item.tweet, "bulk") for _, item in valid))
+    except InferenceQueueFull as e:
+        # Texts admitted before the lane filled still finish and land in the cache for the retry
+        raise queue_full_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing tweets: {str(e)}")
+
+    documents = []
+    for (_, item), prediction in zip(valid, predictions):
+        document = build_sentiment_document(item, prediction)
+        document["_id"] = ObjectId()
+        documents.append(document)
+
+    failed = {}
+    if write_behind is not None:
+        try:
+            await buffer_documents(documents)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error saving tweets: {str(e)}")
+    else:
+        try:
+            await stamp_sequence(documents)
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = error.get("errmsg", "Write failed")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error saving tweets: {str(e)}")
+
+        await on_inserted([document for position, document in enumerate(documents) if position not in failed])
+
+    for position, ((index, _), document) in enumerate(zip(valid, documents)):
+        if position in failed:
+            results.append({"index": index, "error": failed[position]})
+        else:
+            results.append({"index": index, "_id": str(document["_id"])})
+    results.sort(key=lambda r: r["index"])
+
+    return {
+        "message": "Batch processed",
+        "inserted": len(documents) - len(failed),
+        "results": results
+    }
+
 @app.get("/sentiments", response_model=List[SentimentData])
-async def get_sentiments():
+async def get_sentiments(
+    request: Request,
+    response: Response,
+    coin: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("rows", pattern=FORMAT_PATTERN)
+):
+    """
+    Newest sentiments first, optionally filtered by coin, [start, end) and label.
+    When more results may follow, the X-Next-Cursor response header holds the
+    cursor to pass back for the next page.
+    format=columnar returns one array per field, with dates as epoch ms in "t".
+    Responses carry an ETag; a matching If-None-Match gets 304 until new tweets arrive.
+    """
+    try:
+        query = apply_cursor(build_sentiment_filter(coin, start, end, type), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        sentiments = await collection.find(
-            {}, {"_id": 1, "type": 1, "coefficient": 1, "followC": 1, "likeC": 1, "viewC": 1, "date": 1, "coinType": 1}
-        ).to_list(length=200)
+        etag = make_etag("sentiments", await sentiment_version(), coin, start, end, type, limit, cursor, format)
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
+
+        sentiments = await collection.find(query, SENTIMENT_PROJECTION).sort(SENTIMENT_SORT).limit(limit).to_list(length=limit)
+
+        headers = validator_headers(etag)
+        cursor_out = next_cursor(sentiments, limit)
+        if cursor_out:
+            headers["X-Next-Cursor"] = cursor_out
+
+        if format == "columnar":
+            # A returned response doesn't inherit headers set on the injected one
+            return ORJSONResponse(sentiment_columns(sentiments), headers=headers)
+        response.headers.update(headers)
 
         for s in sentiments:
             s["_id"] = str(s["_id"])
@@ -103,78 +618,328 @@ async def get_sentiments():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving sentiments: {str(e)}")
 
-@app.get("/bitcoin-data")
-async def get_bitcoin_data(days: int = 1):
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+@app.get("/sentiments/stream")
+async def stream_sentiments(
+    coin: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type: Optional[str] = None
+):
     """
-    CoinPaprika free plan constraints:
-      - 1 day max hourly data
-      - Up to 1 year (365 days) daily data
-    We'll clamp 1 day to ~23h to be safe, and >1 day up to 364 to avoid partial intervals.
-    If STILL 402 error, consider adjusting the clamping further or upgrading plan.
-    Returns: { "prices": [ {time, price}, ... ] }
+    Exports every matching sentiment as NDJSON (one document per line), newest first.
+    Documents are read from the Motor cursor batch by batch and written straight
+    to the response, so memory use does not grow with the result size.
     """
+    query = build_sentiment_filter(coin, start, end, type)
+    cursor = collection.find(query, SENTIMENT_PROJECTION).sort(SENTIMENT_SORT).batch_size(STREAM_BATCH_SIZE)
 
-    now_utc = datetime.utcnow()
+    async def generate():
+        lines = []
+        try:
+            async for document in cursor:
+                lines.append(json.dumps(document, default=_json_default))
+                if len(lines) >= STREAM_BATCH_SIZE:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+        finally:
+            # Also runs when the client disconnects mid-export: free the server-side cursor now
+            await cursor.close()
 
-    if days == 1:
-        # For 1 day of data, clamp to 23 hours from "now" to avoid crossing the boundary
-        end_dt = now_utc.replace(minute=0, second=0, microsecond=0)
-        start_dt = end_dt - timedelta(hours=23)  # clamp to 23 hours
-        url = (f"{COINPAPRIKA_HISTORICAL_URL}"
-               f"?start={start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-               f"&end={end_dt.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-               f"&interval=1h")
-    else:
-        # daily data
-        if days > 364:
-            days = 364  # clamp max 1 year
-        end_dt = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-        start_dt = end_dt - timedelta(days=days)
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
-        # If they end up identical, shift end by 1 day to avoid zero-range
-        if start_dt == end_dt:
-            end_dt += timedelta(days=1)
+@app.get("/sentiments/live")
+async def live_sentiments(request: Request, coin: Optional[str] = None):
+    """
+    Server-Sent Events stream of new sentiments as they are stored, optionally
+    limited to comma-separated coins. Each event's id is the document _id, or its
+    insert sequence number with SENTIMENT_SEQUENCE, so a reconnecting EventSource
+    (Last-Event-ID) first receives what was stored since it disconnected.
+    Clients that fall LIVE_QUEUE_SIZE events behind get a "dropped" event and
+    the stream ends; reconnecting resumes from their last event.
+    """
+    coins = [c.strip() for c in coin.split(",") if c.strip()] if coin else None
+    # Subscribe before reading the backfill so no insert falls between the two
+    subscription = live_hub.subscribe(coins)
+
+    backfill = []
+    last_event_id = parse_event_id(request.headers.get("Last-Event-ID"))
+    if last_event_id is not None:
+        query = {LIVE_EVENT_FIELD: {"$gt": last_event_id}}
+        if coins:
+            query["coinType"] = {"$in": coins}
+        try:
+            backfill = await collection.find(query, {**SENTIMENT_PROJECTION, LIVE_EVENT_FIELD: 1}).sort(LIVE_EVENT_FIELD, 1).limit(LIVE_BACKFILL_LIMIT).to_list(length=LIVE_BACKFILL_LIMIT)
+        except Exception as e:
+            live_hub.unsubscribe(subscription)
+            raise HTTPException(status_code=500, detail=f"Error retrieving sentiments: {str(e)}")
+    replayed_up_to = backfill[-1][LIVE_EVENT_FIELD] if backfill else None
+
+    async def generate():
+        try:
+            yield "retry: 3000\n\n"
+            for document in backfill:
+                event_id = document.pop("seq", document["_id"])
+                yield f"id: {event_id}\nevent: sentiment\ndata: {json.dumps(document, default=_json_default)}\n\n"
+            while True:
+                if subscription.dropped and subscription.queue.empty():
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                try:
+                    event_id, payload = await asyncio.wait_for(subscription.queue.get(), LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if replayed_up_to is not None and parse_event_id(event_id) <= replayed_up_to:
+                    continue
+                yield f"id: {event_id}\nevent: sentiment\ndata: {payload}\n\n"
+        finally:
+            live_hub.unsubscribe(subscription)
 
-        url = (f"{COINPAPRIKA_HISTORICAL_URL}"
-               f"?start={start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-               f"&end={end_dt.strftime('%Y-%m-%dT%H:%M:%SZ')}"
-               f"&interval=24h")
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
+@app.get("/sentiments/summary")
+async def get_sentiment_summary(
+    coin: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: str = "hour"
+):
+    """
+    Per-coin sentiment series bucketed by hour or day, read from the hourly rollup
+    collection so cost scales with buckets, not tweets. Defaults to the last 7 days.
+    Returns: { "interval", "start", "end", "coins": { coin: { "t": [...], "count": [...],
+               "bullish": [...], "bearish": [...], "neutral": [...], "mean_coefficient": [...],
+               "followers": [...], "likes": [...], "views": [...] } } }
+    """
+    start, end = summary_window(start, end)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-
-        print("[DEBUG] CoinPaprika Response:", response.status_code, response.text)
-
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"CoinPaprika Error: {response.text}"
-            )
-
-        data = response.json()
-        if not isinstance(data, list):
-            raise HTTPException(status_code=500, detail="Invalid response: must be a list")
-
-        formatted_data = []
-        for entry in data:
-            ts_str = entry["timestamp"]
-            ts_obj = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-            if days == 1:
-                # hourly
-                time_str = ts_obj.strftime("%b %d, %H:%M")
-            else:
-                # daily
-                time_str = ts_obj.strftime("%b %d, %Y")
-            price = entry["price"]
-            formatted_data.append({"time": time_str, "price": price})
-
-        return {"prices": formatted_data}
+        pipeline = build_summary_pipeline(start, end, interval, coin)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        coins = await summarize(pipeline)
+        return {"interval": interval, "start": start, "end": end, "coins": coins}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error summarizing sentiments: {str(e)}")
+
+async def summarize(pipeline: List[Dict]) -> Dict[str, Dict]:
+    coins = {}
+    async for series in rollup_collection.aggregate(pipeline):
+        coins[series.pop("_id")] = series
+    return coins
+
+def downsample_prices(entries: List[Dict], points: Optional[int]) -> List[Dict]:
+    if points is None or len(entries) <= points:
+        return entries
+    indices = lttb(
+        [entry["timestamp"].timestamp() for entry in entries],
+        [entry["price"] for entry in entries],
+        points
+    )
+    return [entries[i] for i in indices]
+
+def price_version(entries: List[Dict]):
+    # Past candles never change; the newest one may still be partial and get
+    # refetched with a new price, so its price is part of the version too
+    if not entries:
+        return (0, None, None)
+    return (len(entries), entries[-1]["timestamp"], entries[-1]["price"])
+
+def format_prices(entries: List[Dict], days: int) -> List[Dict]:
+    # hourly labels for 1 day, dates otherwise
+    time_format = "%b %d, %H:%M" if days == 1 else "%b %d, %Y"
+    return [
+        {"time": entry["timestamp"].strftime(time_format), "price": entry["price"]}
+        for entry in entries
+    ]
+
+@app.get("/bitcoin-data")
+async def get_bitcoin_data(request: Request, response: Response,
+                           days: int = Query(1, ge=1), points: Optional[int] = Query(None, ge=3),
+                           format: str = Query("rows", pattern=FORMAT_PATTERN)):
+    """
+    BTC price history: hourly for days=1 (last 23h), daily otherwise (up to 364 days).
+    See price_service.price_window for the CoinPaprika free plan clamping.
+    points: downsample to at most this many points (LTTB)
+    Returns: { "prices": [ {time, price}, ... ] }
+    or with format=columnar: { "prices": { "t": [epoch ms, ...], "price": [...] } }
+    """
+    try:
+        entries = await price_history.history(BITCOIN_ID, days)
+    except UpstreamError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching Bitcoin data: {str(e)}")
 
+    etag = make_etag("bitcoin-data", days, points, format, price_version(entries))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+
+    entries = downsample_prices(entries, points)
+    if format == "columnar":
+        return ORJSONResponse({"prices": price_columns(entries)}, headers=validator_headers(etag))
+    response.headers.update(validator_headers(etag))
+    return {"prices": format_prices(entries, days)}
+
+def parse_tickers(coins: Optional[str]) -> List[str]:
+    """Comma-separated tickers, de-duplicated in order; every tracked coin when omitted"""
+    tickers = [ticker.strip().upper() for ticker in coins.split(",") if ticker.strip()] if coins else list(COIN_IDS)
+    unknown = [ticker for ticker in tickers if ticker not in COIN_IDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown coins: {', '.join(unknown)}")
+    return list(dict.fromkeys(tickers))
+
+@app.get("/prices")
+async def get_prices(request: Request, response: Response,
+                     coins: Optional[str] = None, days: int = Query(1, ge=1),
+                     points: Optional[int] = Query(None, ge=3),
+                     format: str = Query("rows", pattern=FORMAT_PATTERN)):
+    """
+    Price histories for several coins in one response, fetched concurrently
+    under the shared CoinPaprika rate limit.
+    coins: comma-separated tickers (default: every tracked coin)
+    points: downsample each series to at most this many points (LTTB)
+    Returns: { "prices": { ticker: [ {time, price}, ... ] }, "errors": { ticker: detail } }
+    format=columnar returns each series as { "t": [epoch ms, ...], "price": [...] }
+    """
+    tickers = parse_tickers(coins)
+    results = await asyncio.gather(
+        *(price_history.history(COIN_IDS[ticker], days) for ticker in tickers),
+        return_exceptions=True
+    )
+
+    # Partial responses aren't tagged, so clients refetch once the failed coins recover
+    etag = None
+    if not any(isinstance(result, Exception) for result in results):
+        etag = make_etag("prices", tickers, days, points, format, [price_version(result) for result in results])
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
+
+    prices = {}
+    errors = {}
+    for ticker, result in zip(tickers, results):
+        if isinstance(result, UpstreamError):
+            errors[ticker] = result.detail
+        elif isinstance(result, Exception):
+            errors[ticker] = f"Error fetching {ticker} data: {str(result)}"
+        else:
+            entries = downsample_prices(result, points)
+            prices[ticker] = price_columns(entries) if format == "columnar" else format_prices(entries, days)
+
+    # One failing coin shouldn't blank the whole dashboard; fail only if nothing loaded
+    if not prices:
+        first = results[0]
+        status_code = first.status_code if isinstance(first, UpstreamError) else 500
+        raise HTTPException(status_code=status_code, detail=errors)
+
+    headers = validator_headers(etag) if etag else {}
+    if format == "columnar":
+        return ORJSONResponse({"prices": prices, "errors": errors}, headers=headers)
+    response.headers.update(headers)
+    return {"prices": prices, "errors": errors}
+
+@app.get("/dashboard")
+async def get_dashboard(coins: Optional[str] = None, days: int = Query(7, ge=1),
+                        points: Optional[int] = Query(None, ge=3),
+                        format: str = Query("rows", pattern=FORMAT_PATTERN)):
+    """
+    Everything the dashboard page needs in one round trip: price series for the
+    chart, a table row per coin (price, change, prediction ranges) and the
+    sentiment summary over the same window. Price histories and the rollup
+    aggregation run concurrently and share the /prices caches, so the response
+    takes about as long as the slowest of them.
+    Returns: { "days", "prices": { ticker: series }, "table": [ row, ... ],
+               "summary": { "interval", "start", "end", "coins": { ticker: series } },
+               "errors": { ticker or "summary": detail } }
+    """
+    tickers = parse_tickers(coins)
+    interval = "hour" if days == 1 else "day"
+    start, end = summary_window(datetime.now(timezone.utc) - timedelta(days=days), None)
+
+    *histories, summary = await asyncio.gather(
+        *(price_history.history(COIN_IDS[ticker], days) for ticker in tickers),
+        summarize(build_summary_pipeline(start, end, interval)),
+        return_exceptions=True
+    )
+
+    errors = {}
+    if isinstance(summary, Exception):
+        errors["summary"] = f"Error summarizing sentiments: {str(summary)}"
+        summary = {}
+
+    prices = {}
+    table = []
+    for ticker, result in zip(tickers, histories):
+        if isinstance(result, UpstreamError):
+            errors[ticker] = result.detail
+            continue
+        if isinstance(result, Exception):
+            errors[ticker] = f"Error fetching {ticker} data: {str(result)}"
+            continue
+        row = coin_overview(ticker, result, summary.get(ticker), prediction_engine)
+        if row is not None:
+            table.append(row)
+        entries = downsample_prices(result, points)
+        prices[ticker] = price_columns(entries) if format == "columnar" else format_prices(entries, days)
+
+    content = {
+        "days": days,
+        "prices": prices,
+        "table": table,
+        "summary": {
+            "interval": interval, "start": start, "end": end,
+            "coins": {ticker: summary[ticker] for ticker in tickers if ticker in summary},
+        },
+        "errors": errors,
+    }
+    if format == "columnar":
+        return ORJSONResponse(content)
+    return content
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "worker": {"pid": os.getpid(), "role": API_ROLE},
+        "model": {"state": model_state, **model_timings},
+        "inference": batcher.stats() if batcher is not None else None,
+        "sentiment_cache": {
+            **sentiment_cache.stats(),
+            "coalesced": sentiment_inflight.coalesced,
+            "in_flight": len(sentiment_inflight)
+        },
+        "price_cache": price_history.stats() if price_history is not None else None,
+        "write_behind": write_behind.stats() if write_behind is not None else None,
+        "live": live_hub.stats()
+    }
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """Liveness: the process is up. Only a model that failed to load makes it unhealthy."""
+    if model_state == "failed":
+        return ORJSONResponse({"status": "unhealthy", "role": API_ROLE, "model": model_state}, status_code=503)
+    return {"status": "healthy", "role": API_ROLE}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness for load balancers: the model is warm (inference role) and Mongo answers a ping"""
+    checks = {"model": model_state}
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), READY_MONGO_TIMEOUT)
+        checks["mongo"] = "ok"
+    except Exception as e:
+        checks["mongo"] = f"unreachable: {str(e) or type(e).__name__}"
+    ready = checks["mongo"] == "ok" and model_state in ("warm", "disabled")
+    return ORJSONResponse({"status": "ready" if ready else "not ready", "role": API_ROLE, "checks": checks},
+                          status_code=200 if ready else 503)
@@ -0,0 +1,94 @@
+"""
+Rewrites sentiment documents whose `date` is an ISO string into a native BSON datetime.
+
+Works through the collection in _id order, one batch per bulk write, and records
+the last processed _id in the `migrations` collection after every batch. An
+interrupted run picks up where it stopped; --reset starts from the beginning.
+Each update is conditional on the string still being there, so documents
+written or fixed concurrently are left alone.
+
+    python3 migrate_dates.py --batch-size 1000
+"""
+import argparse
+import os
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+MIGRATION_ID = "sentiment_dates_to_bson"
+
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def migrate(collection, migrations, batch_size: int, dry_run: bool = False) -> dict:
+    state = migrations.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = state.get("last_id")
+    totals = {"updated": 0, "skipped": 0, "batches": 0}
+
+    while True:
+        query = {"date": {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(query, {"_id": 1, "date": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        updates = []
+        for document in batch:
+            try:
+                updates.append(UpdateOne(
+                    {"_id": document["_id"], "date": document["date"]},
+                    {"$set": {"date": parse_date(document["date"])}}
+                ))
+            except ValueError:
+                totals["skipped"] += 1
+                print(f"[WARN] Unparseable date on {document['_id']}: {document['date']!r}")
+
+        if updates and not dry_run:
+            totals["updated"] += collection.bulk_write(updates, ordered=False).modified_count
+        else:
+            totals["updated"] += len(updates)
+
+        last_id = batch[-1]["_id"]
+        totals["batches"] += 1
+        if not dry_run:
+            migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {"last_id": last_id, "updated_at": datetime.now(timezone.utc)},
+                 "$inc": {"updated": len(updates)}},
+                upsert=True
+            )
+        print(f"batch {totals['batches']}: {totals['updated']} updated, "
+              f"{totals['skipped']} skipped, last _id {last_id}")
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="parse and count without writing")
+    parser.add_argument("--reset", action="store_true", help="forget the saved position and rescan")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI"))[os.getenv("DB_NAME")]
+    collection = db[os.getenv("COLLECTION_NAME")]
+    migrations = db["migrations"]
+
+    if args.reset:
+        migrations.delete_one({"_id": MIGRATION_ID})
+
+    totals = migrate(collection, migrations, args.batch_size, args.dry_run)
+    print(f"done: {totals['updated']} documents converted, {totals['skipped']} skipped "
+          f"in {totals['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from transformers import (
+    AutoConfig,
+    AutoModelForSequenceClassification,
+    AutoTokenizer,
+    TextClassificationPipeline,
+)
+
+MODEL_NAME = "ElKulako/cryptobert"
+MAX_LENGTH = 64
+BACKENDS = ("torch", "onnx")
+
+
+def load_torch_pipeline(model_name: str = MODEL_NAME) -> TextClassificationPipeline:
+    """
+    Load the fp32 PyTorch classifier. Items are tokenized unpadded and the pipeline's
+    collator pads each batch only to its longest member.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=3)
+    return TextClassificationPipeline(
+        model=model,
+        tokenizer=tokenizer,
+        max_length=MAX_LENGTH,
+        truncation=True
+    )
+
+
+def export_quantized_onnx(model_name: str, output_dir: str) -> str:
+    """
+    Export the classifier to ONNX and apply dynamic int8 quantization.
+    Runs once; later calls reuse the quantized file in output_dir.
+    """
+    quantized_path = os.path.join(output_dir, "model.int8.onnx")
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=3)
+    model.eval()
+    sample = tokenizer(["gm"], max_length=MAX_LENGTH, truncation=True,
+                       padding='max_length', return_tensors="pt")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14
+        )
+
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    return quantized_path
+
+
+class OnnxSentimentClassifier:
+    """
+    ONNX Runtime classifier with the same call contract as TextClassificationPipeline:
+    a list of texts in, a list of {"label", "score"} dicts out.
+    """
+
+    def __init__(self, model_path: str, tokenizer, id2label: Dict[int, str],
+                 num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = tokenizer
+        self.id2label = id2label
+
+    def __call__(self, texts, batch_size: Optional[int] = None) -> List[Dict]:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batch_size = batch_size or len(texts) or 1
+
+        predictions = []
+        for start in range(0, len(texts), batch_size):
+            predictions.extend(self._predict(texts[start:start + batch_size]))
+        return predictions
+
+    def _predict(self, texts: List[str]) -> List[Dict]:
+        encoded = self.tokenizer(texts, max_length=MAX_LENGTH, truncation=True,
+                                 padding='longest', return_tensors="np")
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+
+        # Softmax, matching the pipeline's default for multi-class heads
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        best = probs.argmax(axis=1)
+        return [
+            {"label": self.id2label[int(label_id)], "score": float(probs[row, label_id])}
+            for row, label_id in enumerate(best)
+        ]
+
+
+def token_counter(tokenizer) -> Callable[[List[str]], List[int]]:
+    """Count tokens per text after truncation, used to pick length buckets"""
+    def count(texts: List[str]) -> List[int]:
+        encoded = tokenizer(texts, max_length=MAX_LENGTH, truncation=True)
+        return [len(ids) for ids in encoded["input_ids"]]
+    return count
+
+
+def load_onnx_classifier(model_name: str = MODEL_NAME, onnx_dir: str = "onnx_model",
+                         num_threads: Optional[int] = None) -> OnnxSentimentClassifier:
+    """Load (exporting on first use) the int8-quantized ONNX classifier"""
+    model_path = export_quantized_onnx(model_name, onnx_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    config = AutoConfig.from_pretrained(model_name)
+    return OnnxSentimentClassifier(model_path, tokenizer, config.id2label, num_threads=num_threads)
+
+
+def load_classifier(backend: str = "torch", onnx_dir: str = "onnx_model",
+                    num_threads: Optional[int] = None):
+    """Load the sentiment classifier for the selected inference backend"""
+    if backend == "torch":
+        return load_torch_pipeline()
+    if backend == "onnx":
+        return load_onnx_classifier(onnx_dir=onnx_dir, num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
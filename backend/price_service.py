@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from caching import SingleFlight, TTLCache
+from http_client import TokenBucket, get_with_retry
+from price_store import PriceStore, missing_ranges
+
+COINPAPRIKA_TICKERS_URL = "https://api.coinpaprika.com/v1/tickers"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Tickers tracked by the scraper (webscraper/scraper.py coin_tickers) -> CoinPaprika ids
+COIN_IDS = {
+    "SOL": "sol-solana",
+    "PEPE": "pepe-pepe",
+    "BTC": "btc-bitcoin",
+    "TRUMP": "trump-official-trump",
+    "DOGE": "doge-dogecoin",
+    "SHIB": "shib-shiba-inu",
+}
+
+
+class UpstreamError(Exception):
+    """CoinPaprika answered with an error status or an unexpected payload"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class PriceWindow:
+    interval: str
+    start: datetime
+    end: datetime
+    # Candles only change when the window rolls over, at the next hour or day
+    next_boundary: datetime
+
+
+def price_window(days: int, now: Optional[datetime] = None) -> PriceWindow:
+    """
+    CoinPaprika free plan constraints:
+      - 1 day max hourly data
+      - Up to 1 year (365 days) daily data
+    We'll clamp 1 day to ~23h to be safe, and >1 day up to 364 to avoid partial intervals.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    if days == 1:
+        # For 1 day of data, clamp to 23 hours from "now" to avoid crossing the boundary
+        end = now.replace(minute=0, second=0, microsecond=0)
+        return PriceWindow("1h", end - timedelta(hours=23), end, end + timedelta(hours=1))
+
+    days = min(days, 364)  # clamp max 1 year
+    end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    next_boundary = end + timedelta(days=1)
+    start = end - timedelta(days=days)
+
+    # If they end up identical, shift end by 1 day to avoid zero-range
+    if start == end:
+        end += timedelta(days=1)
+
+    return PriceWindow("24h", start, end, next_boundary)
+
+
+class PriceHistoryService:
+    """
+    Historical prices from CoinPaprika behind a cache keyed by (coin, interval, range).
+
+    Entries expire at the next candle boundary (plus a grace period for the
+    upstream to publish the new candle), and concurrent misses for the same key
+    share one upstream request. With a PriceStore, cache misses are served from
+    disk and only the candles outside the stored range are fetched.
+    """
+
+    def __init__(self, client: httpx.AsyncClient,
+                 base_url: str = COINPAPRIKA_TICKERS_URL,
+                 retries: int = 3,
+                 cache_size: int = 256,
+                 grace_seconds: float = 60.0,
+                 store: Optional[PriceStore] = None,
+                 limiter: Optional[TokenBucket] = None):
+        self.client = client
+        self.limiter = limiter
+        self.store = store
+        self.base_url = base_url
+        self.retries = retries
+        self.grace_seconds = grace_seconds
+        self.cache = TTLCache(maxsize=cache_size)
+        self.inflight = SingleFlight()
+        self.upstream_requests = 0
+        self.upstream_rows = 0
+
+    async def history(self, coin_id: str, days: int) -> List[Dict]:
+        """Return [{"timestamp": datetime, "price": float}, ...] for the window covering `days`"""
+        window = price_window(days)
+        key = (coin_id, window.interval, window.start, window.end)
+        entries = self.cache.get(key)
+        if entries is not None:
+            return entries
+
+        async def load():
+            result = await self._load(coin_id, window)
+            ttl = (window.next_boundary - datetime.now(timezone.utc)).total_seconds() + self.grace_seconds
+            self.cache.set(key, result, ttl=max(ttl, self.grace_seconds))
+            return result
+
+        return await self.inflight.do(key, load)
+
+    async def _load(self, coin_id: str, window: PriceWindow) -> List[Dict]:
+        if self.store is None:
+            return await self._fetch(coin_id, window.interval, window.start, window.end)
+
+        covered = self.store.coverage(coin_id, window.interval)
+        for start, end in missing_ranges(window.start, window.end, covered):
+            candles = await self._fetch(coin_id, window.interval, start, end)
+            self.store.write(coin_id, window.interval, candles, start, end)
+        return self.store.read(coin_id, window.interval, window.start, window.end)
+
+    async def _fetch(self, coin_id: str, interval: str, start: datetime, end: datetime) -> List[Dict]:
+        self.upstream_requests += 1
+        response = await get_with_retry(
+            self.client,
+            f"{self.base_url}/{coin_id}/historical",
+            params={
+                "start": start.strftime(TIMESTAMP_FORMAT),
+                "end": end.strftime(TIMESTAMP_FORMAT),
+                "interval": interval,
+            },
+            retries=self.retries,
+            limiter=self.limiter
+        )
+
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, f"CoinPaprika Error: {response.text}")
+
+        data = response.json()
+        if not isinstance(data, list):
+            raise UpstreamError(500, "Invalid response: must be a list")
+
+        self.upstream_rows += len(data)
+        return [
+            {
+                "timestamp": datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00")),
+                "price": entry["price"],
+            }
+            for entry in data
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            **self.cache.stats(),
+            "coalesced": self.inflight.coalesced,
+            "upstream_requests": self.upstream_requests,
+            "upstream_rows": self.upstream_rows,
+            "throttled": self.limiter.throttled if self.limiter is not None else 0,
+        }
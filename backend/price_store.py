@@ -0,0 +1,116 @@
+"""
+Local SQLite store for historical price candles.
+
+Past candles never change, so each (coin, interval) series is kept on disk
+together with the time range that has already been fetched. A request for a
+window only goes upstream for the parts outside that range: normally just the
+candles published since the last refresh.
+"""
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    coin TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (coin, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    coin TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    PRIMARY KEY (coin, interval)
+);
+"""
+
+
+def to_epoch(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def missing_ranges(start: datetime, end: datetime,
+                   covered: Optional[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """
+    Sub-ranges of [start, end] that still have to be fetched. Only the head and
+    tail are ever missing, because coverage is extended contiguously; a window
+    that does not touch the covered range is fetched whole.
+    """
+    if covered is None:
+        return [(start, end)]
+    covered_start, covered_end = covered
+    if end < covered_start or start > covered_end:
+        return [(start, end)]
+
+    ranges = []
+    if start < covered_start:
+        ranges.append((start, covered_start))
+    if end > covered_end:
+        # Refetch from the last stored candle so a partially published one is replaced
+        ranges.append((covered_end, end))
+    return ranges
+
+
+class PriceStore:
+    """Candles per (coin, interval) plus the contiguous range already fetched for each"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # One connection shared by the event loop thread; queries are short indexed scans
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def coverage(self, coin: str, interval: str) -> Optional[Tuple[datetime, datetime]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT start_ts, end_ts FROM coverage WHERE coin = ? AND interval = ?",
+                (coin, interval)
+            ).fetchone()
+        return (from_epoch(row[0]), from_epoch(row[1])) if row else None
+
+    def read(self, coin: str, interval: str, start: datetime, end: datetime) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT ts, price FROM candles WHERE coin = ? AND interval = ? AND ts BETWEEN ? AND ? "
+                "ORDER BY ts",
+                (coin, interval, to_epoch(start), to_epoch(end))
+            ).fetchall()
+        return [{"timestamp": from_epoch(ts), "price": price} for ts, price in rows]
+
+    def write(self, coin: str, interval: str, candles: List[Dict], start: datetime, end: datetime,
+              now: Optional[datetime] = None):
+        """
+        Store fetched candles and merge [start, end] into the covered range in one transaction.
+        Coverage stops at ``now``: candles after it can't have been published yet, and
+        marking them covered would keep them from ever being fetched.
+        """
+        end = min(end, now or datetime.now(timezone.utc))
+        covered = self.coverage(coin, interval)
+        if covered is not None and not (end < covered[0] or start > covered[1]):
+            start, end = min(start, covered[0]), max(end, covered[1])
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO candles (coin, interval, ts, price) VALUES (?, ?, ?, ?)",
+                [(coin, interval, to_epoch(candle["timestamp"]), candle["price"]) for candle in candles]
+            )
+            if end < start:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO coverage (coin, interval, start_ts, end_ts) VALUES (?, ?, ?, ?)",
+                (coin, interval, to_epoch(start), to_epoch(end))
+            )
+
+    def close(self):
+        self.conn.close()
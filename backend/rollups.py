@@ -0,0 +1,182 @@
+"""
+Pre-aggregated hourly sentiment rollups.
+
+Every stored sentiment increments one document per (coin, hour) in the rollup
+collection, so summaries read O(buckets) documents instead of O(tweets).
+If the rollups drift (e.g. a failed increment), rebuild them from raw data:
+
+    python3 rollups.py rebuild               # everything
+    python3 rollups.py rebuild --since 2025-02-01
+
+Run migrate_dates.py first: only sentiments with a BSON date are rebuilt, and
+any left with a string date are reported and skipped. Pause ingest while the
+rebuild runs, since merged buckets replace the stored ones and drop increments
+applied by live inserts in the meantime.
+"""
+import argparse
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+
+from sentiment_queries import build_sentiment_filter, to_utc
+
+ROLLUP_LABELS = ("bullish", "bearish", "neutral")
+ROLLUP_SUMS = ("count", *ROLLUP_LABELS, "coefficient_sum", "followers", "likes", "views")
+ROLLUP_INDEX = [("coin", ASCENDING), ("hour", ASCENDING)]
+
+SUMMARY_INTERVALS = ("hour", "day")
+SUMMARY_FIELDS = ("count", *ROLLUP_LABELS, "mean_coefficient", "followers", "likes", "views")
+
+
+def hour_of(date: datetime) -> datetime:
+    return to_utc(date).replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_increments(document: Dict) -> Dict[str, float]:
+    label = str(document["type"]).lower()
+    increments = {
+        "count": 1,
+        "coefficient_sum": float(document["coefficient"]),
+        "followers": document["followC"],
+        "likes": document["likeC"],
+        "views": document["viewC"],
+    }
+    if label in ROLLUP_LABELS:
+        increments[label] = 1
+    return increments
+
+
+def build_rollup_updates(documents: Iterable[Dict]) -> List[UpdateOne]:
+    """
+    Fold sentiment documents into one upsert per (coin, hour), so a batch of
+    tweets costs one write per bucket rather than one per tweet and coin.
+    """
+    buckets: Dict[Tuple[str, datetime], Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    for document in documents:
+        increments = rollup_increments(document)
+        for coin in document["coinType"]:
+            bucket = buckets[(coin, hour_of(document["date"]))]
+            for field, value in increments.items():
+                bucket[field] += value
+
+    return [
+        UpdateOne({"coin": coin, "hour": hour}, {"$inc": dict(sums)}, upsert=True)
+        for (coin, hour), sums in buckets.items()
+    ]
+
+
+async def apply_rollups(rollup_collection, documents: List[Dict]):
+    updates = build_rollup_updates(documents)
+    if updates:
+        await rollup_collection.bulk_write(updates, ordered=False)
+
+
+def summary_window(start: Optional[datetime], end: Optional[datetime],
+                   default_days: int = 7) -> Tuple[datetime, datetime]:
+    """Summaries are always range-bound, aligned to whole hours"""
+    end = to_utc(end) if end is not None else datetime.now(timezone.utc)
+    start = to_utc(start) if start is not None else end - timedelta(days=default_days)
+    return hour_of(start), end
+
+
+def build_summary_pipeline(start: datetime, end: datetime, interval: str = "hour",
+                           coin: Optional[str] = None) -> List[Dict]:
+    """
+    Per-coin series over the rollup collection: label counts, mean coefficient
+    and engagement sums per hour or day, returned as one document per coin
+    holding parallel arrays ordered by bucket time.
+    """
+    if interval not in SUMMARY_INTERVALS:
+        raise ValueError(f"interval must be one of {SUMMARY_INTERVALS}")
+
+    match: Dict = {"hour": {"$gte": start, "$lt": end}}
+    if coin:
+        match["coin"] = coin
+    bucket = "$hour" if interval == "hour" else {"$dateTrunc": {"date": "$hour", "unit": "day"}}
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"coin": "$coin", "bucket": bucket},
+            **{field: {"$sum": f"${field}"} for field in ROLLUP_SUMS},
+        }},
+        {"$sort": {"_id.coin": 1, "_id.bucket": 1}},
+        {"$group": {
+            "_id": "$_id.coin",
+            "t": {"$push": "$_id.bucket"},
+            "mean_coefficient": {"$push": {"$cond": [
+                {"$gt": ["$count", 0]}, {"$divide": ["$coefficient_sum", "$count"]}, 0
+            ]}},
+            **{field: {"$push": f"${field}"} for field in SUMMARY_FIELDS if field != "mean_coefficient"},
+        }},
+    ]
+
+
+def build_rebuild_pipeline(rollup_collection_name: str, since: Optional[datetime] = None) -> List[Dict]:
+    """Recompute hourly rollups from raw sentiments and merge them over the stored ones"""
+    label = {"$toLower": "$type"}
+    match = build_sentiment_filter(start=hour_of(since)) if since else {}
+    # $dateTrunc fails the whole aggregation on a string date; those need migrate_dates.py
+    match["date"] = {**match.get("date", {}), "$type": "date"}
+    return [
+        {"$match": match},
+        {"$unwind": "$coinType"},
+        {"$group": {
+            "_id": {"coin": "$coinType", "hour": {"$dateTrunc": {"date": "$date", "unit": "hour"}}},
+            "count": {"$sum": 1},
+            **{name: {"$sum": {"$cond": [{"$eq": [label, name]}, 1, 0]}} for name in ROLLUP_LABELS},
+            "coefficient_sum": {"$sum": "$coefficient"},
+            "followers": {"$sum": "$followC"},
+            "likes": {"$sum": "$likeC"},
+            "views": {"$sum": "$viewC"},
+        }},
+        {"$project": {
+            "_id": 0, "coin": "$_id.coin", "hour": "$_id.hour",
+            **{field: 1 for field in ROLLUP_SUMS},
+        }},
+        {"$merge": {
+            "into": rollup_collection_name,
+            "on": ["coin", "hour"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+
+def rebuild(db, collection_name: str, rollup_collection_name: str, since: Optional[datetime] = None):
+    rollups = db[rollup_collection_name]
+    rollups.create_index(ROLLUP_INDEX, unique=True)
+    if since is None:
+        rollups.delete_many({})
+    else:
+        rollups.delete_many({"hour": {"$gte": hour_of(since)}})
+    db[collection_name].aggregate(build_rebuild_pipeline(rollup_collection_name, since), allowDiskUse=True)
+    return rollups.count_documents({})
+
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subcommands.add_parser("rebuild", help="recompute rollups from raw sentiments")
+    rebuild_parser.add_argument("--since", type=datetime.fromisoformat,
+                                help="only rebuild hours from this date on (ISO format)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI"), tz_aware=True)[os.getenv("DB_NAME")]
+    rollup_collection_name = os.getenv("ROLLUP_COLLECTION_NAME", "sentiment_rollups")
+    buckets = rebuild(db, os.getenv("COLLECTION_NAME"), rollup_collection_name, args.since)
+    print(f"rebuilt {rollup_collection_name}: {buckets} (coin, hour) buckets")
+    skipped = db[os.getenv("COLLECTION_NAME")].count_documents({"date": {"$not": {"$type": "date"}}})
+    if skipped:
+        print(f"[WARN] skipped {skipped} sentiments without a BSON date; run migrate_dates.py and rebuild again")
+
+
+if __name__ == "__main__":
+    main()
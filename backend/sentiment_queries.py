@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+SENTIMENT_PROJECTION = {
+    "_id": 1, "type": 1, "coefficient": 1, "followC": 1,
+    "likeC": 1, "viewC": 1, "date": 1, "coinType": 1
+}
+
+# Newest first; _id breaks ties between tweets sharing a timestamp. Documents not yet
+# converted by migrate_dates.py keep an ISO-string date; BSON orders strings below
+# dates, so those come after every native date, newest string first
+SENTIMENT_SORT = [("date", DESCENDING), ("_id", DESCENDING)]
+
+# Every listing filter is an equality prefix followed by the (date, _id) sort,
+# so each query walks one of these indexes in order and stops after `limit`
+SENTIMENT_INDEXES = [
+    [("date", DESCENDING), ("_id", DESCENDING)],
+    [("coinType", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)],
+    [("type", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)],
+]
+
+
+def to_utc(value: datetime) -> datetime:
+    """Naive datetimes are taken to be UTC, which is also how BSON dates come back from Mongo"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def build_sentiment_filter(coin: Optional[str] = None,
+                           start: Optional[datetime] = None,
+                           end: Optional[datetime] = None,
+                           sentiment_type: Optional[str] = None) -> Dict:
+    """Filter for coin, [start, end) date range and sentiment label"""
+    query: Dict = {}
+    if coin:
+        query["coinType"] = coin
+    if sentiment_type:
+        # Model labels are capitalized ("Bullish"); accept any casing from callers
+        query["type"] = {"$in": sorted({sentiment_type.capitalize(), sentiment_type.lower()})}
+    date_range = {}
+    if start is not None:
+        date_range["$gte"] = to_utc(start)
+    if end is not None:
+        date_range["$lt"] = to_utc(end)
+    if date_range:
+        query["date"] = date_range
+    return query
+
+
+def encode_cursor(document: Dict) -> str:
+    """Opaque keyset cursor pointing just past the given document"""
+    date = document["date"]
+    if isinstance(date, str):
+        # Unmigrated document: keep the raw string, it is what the next page compares against
+        payload = {"legacy_date": date, "id": str(document["_id"])}
+    else:
+        payload = {"date": to_utc(date).isoformat(), "id": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Union[datetime, str], ObjectId]:
+    """The cursor's date is a datetime, or the raw string of an unmigrated document"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if "legacy_date" in payload:
+            return str(payload["legacy_date"]), ObjectId(payload["id"])
+        return datetime.fromisoformat(payload["date"]), ObjectId(payload["id"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+
+def apply_cursor(query: Dict, cursor: Optional[str]) -> Dict:
+    """Restrict a filter to documents that sort after the cursor"""
+    if not cursor:
+        return query
+    date, last_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {"date": {"$lt": date}},
+        {"date": date, "_id": {"$lt": last_id}},
+    ]}
+    if not isinstance(date, str):
+        # $lt on a date never matches strings, but every string date sorts after it
+        after_cursor["$or"].append({"date": {"$type": "string"}})
+    if not query:
+        return after_cursor
+    return {"$and": [query, after_cursor]}
+
+
+def next_cursor(page: List[Dict], limit: int) -> Optional[str]:
+    """A full page may have more results behind it; a short page is the last one"""
+    if len(page) < limit:
+        return None
+    return encode_cursor(page[-1])
@@ -0,0 +1,50 @@
+"""
+Insert sequence for stored sentiments, used with SENTIMENT_SEQUENCE (on by
+default with WRITE_BEHIND); synchronous inserts keep using the newest ``_id``.
+
+The ``_id`` is assigned when a tweet is accepted, but with write-behind the
+document may reach Mongo much later (another worker's flush, a requeue after an
+outage, WAL replay), behind documents with newer ``_id``s. Anything that needs
+"what changed since" therefore uses a counter document instead:
+
+- ``seq`` is allocated just before each insert and stored on the documents, so
+  /sentiments/live can resume from a ``seq`` (Last-Event-ID);
+- ``committed`` is bumped after every successful insert, so it is the data
+  version behind the /sentiments ETag and moves on every insert.
+
+A reconnect can still miss a document whose ``seq`` was allocated by another
+worker whose insert was still in flight at that moment; the window is one
+insert round trip, not the write-behind flush delay.
+"""
+from typing import Dict, List
+
+from pymongo import ASCENDING, ReturnDocument
+
+SEQUENCE_ID = "sentiments"
+SEQUENCE_INDEX = [("seq", ASCENDING)]
+
+
+async def assign_sequence(sequence_collection, documents: List[Dict]):
+    """Stamp consecutive ``seq`` values on documents about to be inserted (one round trip)"""
+    if not documents:
+        return
+    counter = await sequence_collection.find_one_and_update(
+        {"_id": SEQUENCE_ID},
+        {"$inc": {"seq": len(documents)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    first = counter["seq"] - len(documents) + 1
+    for offset, document in enumerate(documents):
+        document["seq"] = first + offset
+
+
+async def mark_committed(sequence_collection, count: int):
+    """Bump the data version once ``count`` documents are visible in the collection"""
+    if count:
+        await sequence_collection.update_one({"_id": SEQUENCE_ID}, {"$inc": {"committed": count}}, upsert=True)
+
+
+async def data_version(sequence_collection) -> int:
+    counter = await sequence_collection.find_one({"_id": SEQUENCE_ID}, {"committed": 1})
+    return counter.get("committed", 0) if counter else 0
@@ -0,0 +1,118 @@
+"""
+Pre-fork server for multi-core inference.
+
+The classifier is loaded once in this parent process, then N workers are forked
+and serve the app on a shared listening socket. Model weights are only read
+after loading, so the workers share those pages copy-on-write instead of each
+holding its own copy (as `uvicorn --workers N` does). A crashed worker is
+replaced by forking the parent again, which needs no model reload.
+
+    python3 serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+Forward passes are never run in the parent: the inference thread pool and
+torch intra-op threads are created in each worker after the fork, with the
+cores split between workers unless INFERENCE_THREADS is set. ONNX Runtime
+sessions own a thread pool that does not survive fork(), so with
+INFERENCE_BACKEND=onnx the parent only exports the quantized model file and
+each worker opens its own session from it.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+import main as api
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn_worker(sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Child: restore default signal handling, uvicorn installs its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        config = uvicorn.Config(api.app, log_level=log_level)
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    boot_start = time.perf_counter()
+    sock = bind_socket(args.host, args.port)
+
+    if api.INFERENCE_THREADS is None:
+        # Otherwise every worker sizes its compute threads to all cores: ~cores^2 threads in total
+        api.INFERENCE_THREADS = max(1, (os.cpu_count() or 1) // (args.workers * max(1, api.INFERENCE_WORKERS)))
+
+    if api.API_ROLE == "inference" and api.INFERENCE_BACKEND == "onnx":
+        from model_backends import MODEL_NAME, export_quantized_onnx
+        export_quantized_onnx(MODEL_NAME, api.ONNX_MODEL_DIR)
+        print(f"[serve] ONNX model ready in {time.perf_counter() - boot_start:.1f}s, forking {args.workers} workers "
+              f"({api.INFERENCE_THREADS} threads each); sessions open in the workers")
+    elif api.preload_classifier() is not None:
+        print(f"[serve] model loaded in {time.perf_counter() - boot_start:.1f}s, forking {args.workers} workers "
+              f"({api.INFERENCE_THREADS} threads each)")
+    else:
+        print(f"[serve] API_ROLE={api.API_ROLE}, no model to load, forking {args.workers} workers")
+
+    # Move everything allocated so far out of the collector's reach; otherwise
+    # the first GC pass in each worker touches every object header and unshares the pages
+    gc.freeze()
+
+    workers = {spawn_worker(sock, args.log_level) for _ in range(args.workers)}
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"[serve] worker {pid} exited with status {status}, respawning")
+            workers.add(spawn_worker(sock, args.log_level))
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
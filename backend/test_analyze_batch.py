@@ -0,0 +1,157 @@
+import os
+import json
+import unittest
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError
+
+# main reads its settings on import; the read role keeps the model out of the process
+os.environ.setdefault("API_ROLE", "read")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("COLLECTION_NAME", "sentiments")
+
+import main
+from caching import TTLCache
+from inference import InferenceQueueFull
+
+
+def tweet(text, **fields):
+    return {"tweet": text, "followC": 1, "likeC": 2, "viewC": 3,
+            "date": "2025-02-08T14:30:00Z", "coinType": ["BTC"], **fields}
+
+
+class FakeBatcher:
+    def __init__(self, full=False):
+        self.full = full
+        self.submitted = []
+
+    async def submit(self, text, priority="interactive"):
+        if self.full:
+            raise InferenceQueueFull(priority, retry_after=2)
+        self.submitted.append((text, priority))
+        return {"label": "Bullish" if "moon" in text else "Bearish", "score": 0.9}
+
+
+class FakeCollection:
+    """insert_many rejects documents with followC == 13, the way a duplicate key would"""
+
+    def __init__(self):
+        self.inserted = []
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        errors = []
+        for index, document in enumerate(documents):
+            if document["followC"] == 13:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.inserted.append(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeRollups:
+    def __init__(self):
+        self.updates = 0
+
+    async def bulk_write(self, updates, ordered=True):
+        self.updates += len(updates)
+
+
+class TestParseTweetBatch(unittest.TestCase):
+    def test_json_array_keeps_errors_aligned_with_input(self):
+        body = json.dumps([tweet("moon"), {"tweet": "no counts"}, tweet("dump")]).encode()
+        items = main.parse_tweet_batch(body, "application/json")
+
+        self.assertEqual([type(item).__name__ for item in items], ["TweetData", "str", "TweetData"])
+        self.assertTrue(items[1].startswith("Invalid tweet"))
+
+    def test_ndjson_skips_blank_lines_and_reports_bad_json(self):
+        body = "\n".join([json.dumps(tweet("moon")), "", "{not json", json.dumps(tweet("dump"))]).encode()
+        items = main.parse_tweet_batch(body, "application/x-ndjson")
+
+        self.assertEqual(len(items), 3)
+        self.assertTrue(items[1].startswith("Invalid JSON"))
+        self.assertEqual(items[2].tweet, "dump")
+
+    def test_json_body_must_be_an_array(self):
+        with self.assertRaises(HTTPException) as raised:
+            main.parse_tweet_batch(json.dumps(tweet("moon")).encode(), "application/json")
+        self.assertEqual(raised.exception.status_code, 400)
+
+    def test_batches_over_the_limit_are_rejected(self):
+        body = json.dumps([tweet(str(i)) for i in range(main.MAX_BATCH_ITEMS + 1)]).encode()
+        with self.assertRaises(HTTPException) as raised:
+            main.parse_tweet_batch(body, "application/json")
+        self.assertEqual(raised.exception.status_code, 413)
+
+
+class TestAnalyzeBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.saved = {name: getattr(main, name) for name in
+                      ("batcher", "collection", "rollup_collection", "sentiment_cache", "write_behind")}
+        main.batcher = FakeBatcher()
+        main.collection = FakeCollection()
+        main.rollup_collection = FakeRollups()
+        main.sentiment_cache = TTLCache(maxsize=100, ttl=60)
+        main.write_behind = None
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(main, name, value)
+
+    def test_write_errors_map_back_to_request_indexes(self):
+        body = [tweet("to the moon"), {"tweet": "invalid"}, tweet("dup", followC=13, date="2025-02-08T16:30:00Z"),
+                tweet("dump", date="2025-02-08T15:30:00Z")]
+        response = self.client.post("/analyze/batch", json=body)
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["inserted"], 2)
+        self.assertEqual([r["index"] for r in result["results"]], [0, 1, 2, 3])
+        self.assertIn("_id", result["results"][0])
+        self.assertTrue(result["results"][1]["error"].startswith("Invalid tweet"))
+        self.assertEqual(result["results"][2]["error"], "duplicate key")
+        self.assertIn("_id", result["results"][3])
+        self.assertEqual([d["type"] for d in main.collection.inserted], ["Bullish", "Bearish"])
+        # Every valid tweet is scored in the bulk lane; only stored ones reach the rollups (one hour each)
+        self.assertEqual([priority for _, priority in main.batcher.submitted], ["bulk"] * 3)
+        self.assertEqual(main.rollup_collection.updates, 2)
+
+    def test_ndjson_body(self):
+        body = "\n".join(json.dumps(tweet(text)) for text in ("moon", "dump"))
+        response = self.client.post("/analyze/batch", content=body,
+                                    headers={"Content-Type": "application/x-ndjson"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["inserted"], 2)
+
+    def test_no_valid_tweets_skips_the_model_and_the_insert(self):
+        response = self.client.post("/analyze/batch", json=[{"tweet": "invalid"}])
+
+        self.assertEqual(response.json()["inserted"], 0)
+        self.assertEqual(main.batcher.submitted, [])
+        self.assertEqual(main.collection.calls, 0)
+
+    def test_malformed_and_oversized_bodies(self):
+        response = self.client.post("/analyze/batch", content="[{", headers={"Content-Type": "application/json"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/analyze/batch", json=[tweet(str(i)) for i in range(main.MAX_BATCH_ITEMS + 1)])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(main.collection.calls, 0)
+
+    def test_full_bulk_lane_is_429_with_retry_after(self):
+        main.batcher = FakeBatcher(full=True)
+        response = self.client.post("/analyze/batch", json=[tweet("moon")])
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "2")
+        self.assertEqual(main.collection.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Runs in a fresh interpreter: fails any import of the inference stack, then boots
+# the read role's model hook and checks /analyze is refused
+READ_ROLE_SCRIPT = """
+import asyncio
+import sys
+
+BLOCKED = ("transformers", "torch", "onnxruntime", "model_backends")
+
+class BlockInferenceImports:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in BLOCKED:
+            raise ImportError(f"read role imported {name}")
+        return None
+
+sys.meta_path.insert(0, BlockInferenceImports())
+
+import main
+from fastapi import HTTPException
+
+assert main.preload_classifier() is None
+asyncio.run(main.load_model())
+assert main.batcher is None
+try:
+    main.require_inference()
+except HTTPException as e:
+    assert e.status_code == 503, e.status_code
+else:
+    raise AssertionError("require_inference() accepted a read replica")
+print("ok")
+"""
+
+
+class TestReadRole(unittest.TestCase):
+    def run_script(self, role: str):
+        env = {**os.environ, "API_ROLE": role, "DB_NAME": "test", "COLLECTION_NAME": "sentiments"}
+        return subprocess.run([sys.executable, "-c", READ_ROLE_SCRIPT], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, timeout=60)
+
+    def test_read_role_never_imports_the_model(self):
+        result = self.run_script("read")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "ok")
+
+    def test_unknown_role_is_rejected(self):
+        result = self.run_script("writer")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("Unknown API_ROLE", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
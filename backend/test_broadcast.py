@@ -0,0 +1,50 @@
+import unittest
+import asyncio
+
+from broadcast import BroadcastHub
+
+
+class TestBroadcastHub(unittest.TestCase):
+    def test_events_reach_matching_subscribers_only(self):
+        async def run():
+            hub = BroadcastHub(queue_size=10)
+            everything = hub.subscribe()
+            solana = hub.subscribe(["SOL"])
+            hub.publish("1", ["Bitcoin", "BTC"], "btc")
+            hub.publish("2", ["Solana", "SOL"], "sol")
+            return everything.queue.qsize(), [solana.queue.get_nowait()], solana.queue.empty()
+
+        size, solana_events, solana_empty = asyncio.run(run())
+        self.assertEqual(size, 2)
+        self.assertEqual(solana_events, [("2", "sol")])
+        self.assertTrue(solana_empty)
+
+    def test_slow_subscriber_is_dropped_without_blocking_others(self):
+        async def run():
+            hub = BroadcastHub(queue_size=2)
+            slow = hub.subscribe()
+            fast = hub.subscribe()
+            for n in range(3):
+                hub.publish(str(n), ["BTC"], "x")
+                fast.queue.get_nowait()
+            return hub, slow, fast
+
+        hub, slow, fast = asyncio.run(run())
+        self.assertTrue(slow.dropped)
+        self.assertFalse(fast.dropped)
+        self.assertEqual(slow.queue.qsize(), 2)
+        self.assertEqual(hub.stats(), {"subscribers": 1, "published": 3, "dropped": 1})
+
+    def test_unsubscribe(self):
+        async def run():
+            hub = BroadcastHub()
+            subscription = hub.subscribe()
+            hub.unsubscribe(subscription)
+            hub.publish("1", ["BTC"], "x")
+            return subscription.queue.empty()
+
+        self.assertTrue(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import asyncio
+from caching import SingleFlight, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=self.clock)
+
+    def test_hits_and_misses(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2, ttl=30)
+        self.clock.now = 15
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "bullish"
+
+        async def run_test():
+            flight = SingleFlight()
+            results = await asyncio.gather(*(flight.do("same text", work) for _ in range(5)))
+            return flight, results
+
+        flight, results = asyncio.run(run_test())
+        self.assertEqual(calls, 1)
+        self.assertEqual(results, ["bullish"] * 5)
+        self.assertEqual(flight.coalesced, 4)
+        self.assertEqual(len(flight), 0)
+
+    def test_errors_are_shared(self):
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        async def run_test():
+            flight = SingleFlight()
+            return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run_test())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+import unittest
+import gzip
+import zlib
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from bson import ObjectId
+
+from columnar import sentiment_columns
+from compression import CompressionMiddleware, Compressor, choose_encoding
+
+BODY = "price,96000\n" * 500
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+    return app
+
+
+class TestChooseEncoding(unittest.TestCase):
+    def test_prefers_brotli_when_available(self):
+        self.assertEqual(choose_encoding("gzip, deflate, br", brotli_available=True), "br")
+        self.assertEqual(choose_encoding("gzip, deflate, br", brotli_available=False), "gzip")
+
+    def test_respects_quality_values(self):
+        self.assertEqual(choose_encoding("br;q=0.5, gzip", brotli_available=True), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity", brotli_available=True))
+        self.assertEqual(choose_encoding("*", brotli_available=False), "gzip")
+        self.assertIsNone(choose_encoding("", brotli_available=True))
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(make_app())
+
+    def test_large_bodies_are_gzipped(self):
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertLess(int(response.headers["content-length"]), len(BODY))
+        self.assertEqual(response.text, BODY)
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+
+    def test_small_bodies_and_unsupported_clients_are_untouched(self):
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+        response = self.client.get("/large", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.text, BODY)
+
+    def test_streams_are_compressed(self):
+        with self.client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            self.assertEqual(response.headers["content-encoding"], "gzip")
+            raw = b"".join(response.iter_raw())
+        self.assertEqual(gzip.decompress(raw).decode(), BODY * 2)
+
+    def test_each_streamed_chunk_is_decodable_on_arrival(self):
+        compressor = Compressor("gzip", gzip_level=6, brotli_quality=5)
+        decoder = zlib.decompressobj(31)
+        self.assertEqual(decoder.decompress(compressor.compress(b'{"n": 1}\n')), b'{"n": 1}\n')
+        self.assertEqual(decoder.decompress(compressor.finish(b'{"n": 2}\n')), b'{"n": 2}\n')
+
+
+class TestColumnar(unittest.TestCase):
+    def test_unmigrated_string_dates_become_epoch_ms(self):
+        row = {"type": "Bullish", "coefficient": 0.9, "followC": 1, "likeC": 2, "viewC": 3, "coinType": ["BTC"]}
+        documents = [
+            {**row, "_id": ObjectId(), "date": datetime(2025, 1, 5, 10, tzinfo=timezone.utc)},
+            {**row, "_id": ObjectId(), "date": "2025-01-05T10:00:00Z"},
+            {**row, "_id": ObjectId(), "date": "2025-01-05T10:00:00"},
+            {**row, "_id": ObjectId(), "date": "2025-01-05T11:00:00+01:00"},
+        ]
+        self.assertEqual(sentiment_columns(documents)["t"], [1736071200000] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
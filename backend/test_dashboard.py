@@ -0,0 +1,42 @@
+import unittest
+
+from dashboard import coin_overview, sentiment_signal
+from price_prediction import PricePredictionEngine
+
+ENTRIES = [{"price": price} for price in (100.0, 101.0, 99.0, 104.0)]
+
+
+class TestSentimentSignal(unittest.TestCase):
+    def test_net_sentiment_and_trend(self):
+        signal = sentiment_signal({"count": [4, 2], "bullish": [3, 0], "bearish": [1, 2]})
+        self.assertEqual(signal["tweets"], 6)
+        self.assertAlmostEqual(signal["average_sentiment"], 0.0)
+        self.assertAlmostEqual(signal["trend_strength"], -1.0)
+
+    def test_missing_series_is_neutral(self):
+        self.assertEqual(sentiment_signal(None)["average_sentiment"], 0.0)
+        self.assertEqual(sentiment_signal({"count": [0], "bullish": [0], "bearish": [0]})["tweets"], 0)
+
+
+class TestCoinOverview(unittest.TestCase):
+    def test_row_has_price_change_and_predictions(self):
+        series = {"count": [5], "bullish": [5], "bearish": [0]}
+        row = coin_overview("BTC", ENTRIES, series, PricePredictionEngine())
+        self.assertEqual(row["valuation"], 104.0)
+        self.assertAlmostEqual(row["delta"], 4.0)
+        self.assertEqual(set(row["predictions"]), {"1d", "7d"})
+        # Fully bullish sentiment predicts a range above the current price
+        self.assertGreater(row["predictions"]["1d"]["min_price"], 104.0)
+        self.assertIsInstance(row["predictions"]["1d"]["confidence"], float)
+
+    def test_bearish_sentiment_predicts_below_current_price(self):
+        series = {"count": [5], "bullish": [0], "bearish": [5]}
+        row = coin_overview("BTC", ENTRIES, series, PricePredictionEngine())
+        self.assertLess(row["predictions"]["7d"]["max_price"], 104.0)
+
+    def test_no_prices_no_row(self):
+        self.assertIsNone(coin_overview("BTC", [], None, PricePredictionEngine()))
+
+
+if __name__ == "__main__":
+    unittest.main()
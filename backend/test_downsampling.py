@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from downsampling import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward per-point LTTB, as in the original paper"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    prev = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n - 1)
+        if i == threshold - 3:
+            next_lo, next_hi = n - 1, n
+        avg_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[prev] - avg_x) * (y[j] - y[prev]) - (x[prev] - x[j]) * (avg_y - y[prev]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        prev = best
+    selected.append(n - 1)
+    return selected
+
+
+class TestLTTB(unittest.TestCase):
+    def test_matches_reference_implementation(self):
+        rng = np.random.default_rng(7)
+        x = np.cumsum(rng.uniform(0.5, 1.5, 1000))
+        y = np.cumsum(rng.normal(size=1000))
+        for threshold in (3, 10, 97, 500):
+            self.assertEqual(lttb(x, y, threshold).tolist(), reference_lttb(x.tolist(), y.tolist(), threshold))
+
+    def test_keeps_endpoints_and_extremes(self):
+        x = np.arange(100, dtype=float)
+        y = np.zeros(100)
+        y[37], y[71] = 50.0, -50.0
+        indices = lttb(x, y, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(37, indices)
+        self.assertIn(71, indices)
+
+    def test_short_series_are_returned_whole(self):
+        self.assertEqual(lttb([1, 2, 3], [4, 5, 6], 10).tolist(), [0, 1, 2])
+
+    def test_threshold_below_three_is_rejected(self):
+        with self.assertRaises(ValueError):
+            lttb(range(10), range(10), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from datetime import datetime, timezone
+
+from etags import etag_matches, make_etag, not_modified
+
+
+class TestETags(unittest.TestCase):
+    def test_tags_are_stable_and_depend_on_every_part(self):
+        latest = datetime(2025, 2, 8, tzinfo=timezone.utc)
+        etag = make_etag("prices", 7, None, latest)
+        self.assertEqual(etag, make_etag("prices", 7, None, latest))
+        self.assertNotEqual(etag, make_etag("prices", 30, None, latest))
+        self.assertTrue(etag.startswith('W/"'))
+
+    def test_weak_comparison_and_lists(self):
+        etag = make_etag("sentiments", 1)
+        opaque = etag[2:]
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(opaque, etag))
+        self.assertTrue(etag_matches(f'W/"other", {etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('W/"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+    def test_not_modified_has_no_body(self):
+        response = not_modified('W/"abc"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.headers["etag"], 'W/"abc"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import asyncio
+
+import httpx
+
+from http_client import TokenBucket, get_with_retry, retry_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_is_served_without_waiting(self):
+        bucket = TokenBucket(rate=5, capacity=3, clock=FakeClock())
+
+        async def run():
+            for _ in range(3):
+                await bucket.acquire()
+
+        asyncio.run(asyncio.wait_for(run(), timeout=1))
+        self.assertEqual(bucket.throttled, 0)
+
+    def test_requests_past_the_burst_wait_for_refill(self):
+        bucket = TokenBucket(rate=100, capacity=2)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+            return loop.time() - start
+
+        elapsed = asyncio.run(run())
+        # 2 from the burst, then 4 more at 100/s
+        self.assertGreaterEqual(elapsed, 0.035)
+        self.assertEqual(bucket.throttled, 4)
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    async def acquire(self):
+        self.acquired += 1
+
+
+class TestGetWithRetry(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+    def fetch(self, responses, **kwargs):
+        """Serve `responses` in order; an exception instance is raised as a transport error"""
+        queue = list(responses)
+
+        def handler(request):
+            self.requests.append(request)
+            outcome = queue.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await get_with_retry(client, "https://upstream.test/prices",
+                                            backoff=0.001, max_backoff=0.01, **kwargs)
+
+        return asyncio.run(run())
+
+    def test_transient_failures_are_retried_until_success(self):
+        response = self.fetch([
+            httpx.Response(503),
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json=[]),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_other_client_errors_are_returned_without_retrying(self):
+        response = self.fetch([httpx.Response(402, text="plan limit")])
+        self.assertEqual(response.status_code, 402)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_last_response_is_returned_once_retries_run_out(self):
+        response = self.fetch([httpx.Response(503)] * 3, retries=2)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_transport_error_on_the_last_attempt_is_raised(self):
+        with self.assertRaises(httpx.ConnectError):
+            self.fetch([httpx.ConnectError("refused")] * 3, retries=2)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_every_attempt_goes_through_the_limiter(self):
+        limiter = CountingLimiter()
+        self.fetch([httpx.ConnectError("refused"), httpx.Response(502), httpx.Response(200)], limiter=limiter)
+        self.assertEqual(limiter.acquired, 3)
+
+    def test_retry_after_is_honored_up_to_the_cap(self):
+        self.assertEqual(retry_delay(httpx.Response(429, headers={"Retry-After": "3"}), 0, 0.5, 8.0), 3.0)
+        self.assertEqual(retry_delay(httpx.Response(429, headers={"Retry-After": "30"}), 0, 0.5, 8.0), 8.0)
+        # Without it: exponential backoff with jitter in [50%, 100%]
+        delay = retry_delay(httpx.Response(503), 2, 0.5, 8.0)
+        self.assertTrue(1.0 <= delay <= 2.0, delay)
+
+
+if __name__ == "__main__":
+    unittest.main()
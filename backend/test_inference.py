@@ -0,0 +1,186 @@
+import unittest
+import asyncio
+import time
+from inference import InferenceQueueFull, MicroBatcher, create_inference_executor, length_bucketed, warmup_batches
+from metrics import Histogram
+
+
+class FakeClassifier:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [{"label": "Bullish" if "moon" in text else "Bearish", "score": 0.9} for text in texts]
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_requests_share_a_batch(self):
+        classifier = FakeClassifier()
+
+        async def run_test():
+            batcher = MicroBatcher(classifier, max_batch_size=32, max_wait_ms=50)
+            batcher.start()
+            texts = [f"btc to the moon {i}" if i % 2 else f"btc dump {i}" for i in range(10)]
+            results = await asyncio.gather(*(batcher.submit(t) for t in texts))
+            await batcher.stop()
+            return texts, results
+
+        texts, results = asyncio.run(run_test())
+        self.assertEqual(classifier.batch_sizes, [10])
+        for text, result in zip(texts, results):
+            expected = "Bullish" if "moon" in text else "Bearish"
+            self.assertEqual(result["label"], expected)
+
+    def test_batches_are_capped_at_max_size(self):
+        classifier = FakeClassifier()
+
+        async def run_test():
+            batcher = MicroBatcher(classifier, max_batch_size=4, max_wait_ms=50)
+            batcher.start()
+            await asyncio.gather(*(batcher.submit(str(i)) for i in range(10)))
+            await batcher.stop()
+
+        asyncio.run(run_test())
+        self.assertEqual(classifier.batch_sizes, [4, 4, 2])
+
+    def test_errors_reach_every_waiter(self):
+        def failing(texts):
+            raise ValueError("model exploded")
+
+        async def run_test():
+            batcher = MicroBatcher(failing, max_batch_size=8, max_wait_ms=5)
+            batcher.start()
+            results = await asyncio.gather(
+                *(batcher.submit(str(i)) for i in range(3)), return_exceptions=True
+            )
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(run_test())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_inference_does_not_block_event_loop(self):
+        def slow(texts):
+            time.sleep(0.2)
+            return [{"label": "Neutral", "score": 0.5} for _ in texts]
+
+        async def run_test():
+            executor = create_inference_executor(workers=1)
+            batcher = MicroBatcher(slow, max_batch_size=8, max_wait_ms=1, executor=executor)
+            batcher.start()
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.get_running_loop().create_task(ticker())
+            await batcher.submit("gm")
+            ticking.cancel()
+            await batcher.stop()
+            executor.shutdown()
+            return ticks
+
+        self.assertGreater(asyncio.run(run_test()), 5)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    def test_interactive_requests_are_batched_ahead_of_bulk(self):
+        order = []
+
+        def record(texts):
+            order.append(list(texts))
+            return [{"label": "Neutral", "score": 0.5} for _ in texts]
+
+        async def run_test():
+            batcher = MicroBatcher(record, max_batch_size=2, max_wait_ms=20)
+            batcher.start()
+            bulk = [asyncio.ensure_future(batcher.submit(f"bulk {i}", priority="bulk")) for i in range(3)]
+            interactive = [asyncio.ensure_future(batcher.submit(f"user {i}")) for i in range(2)]
+            await asyncio.gather(*bulk, *interactive)
+            await batcher.stop()
+
+        asyncio.run(run_test())
+        self.assertEqual(order[0], ["user 0", "user 1"])
+        self.assertEqual(sorted(sum(order[1:], [])), ["bulk 0", "bulk 1", "bulk 2"])
+
+    def test_full_lane_rejects_immediately_with_retry_after(self):
+        def slow(texts):
+            time.sleep(0.05)
+            return [{"label": "Neutral", "score": 0.5} for _ in texts]
+
+        async def run_test():
+            batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0, queue_limits={"bulk": 2})
+            batcher.start()
+            queued = [asyncio.ensure_future(batcher.submit(str(i), priority="bulk")) for i in range(4)]
+            results = await asyncio.gather(*queued, return_exceptions=True)
+            # The interactive lane is unbounded and unaffected
+            await batcher.submit("user")
+            stats = batcher.stats()
+            await batcher.stop()
+            return results, stats
+
+        results, stats = asyncio.run(run_test())
+        rejected = [r for r in results if isinstance(r, InferenceQueueFull)]
+        self.assertEqual(len(rejected), 2)
+        self.assertGreaterEqual(rejected[0].retry_after, 1)
+        self.assertEqual((stats["bulk"]["admitted"], stats["bulk"]["rejected"]), (2, 2))
+        self.assertEqual(stats["bulk"]["wait_ms"]["count"], 2)
+        self.assertEqual(stats["interactive"]["admitted"], 1)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram([1, 10, 100])
+        for value in (0.5, 5, 5, 50, 500):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["counts"], [1, 2, 1, 1])
+        self.assertEqual(snapshot["p50"], 10)
+        self.assertIsNone(snapshot["p99"])
+        self.assertAlmostEqual(snapshot["mean"], 112.1)
+
+
+class TestLengthBuckets(unittest.TestCase):
+    def test_batches_split_by_token_count_and_order_is_kept(self):
+        classifier = FakeClassifier()
+        seen = []
+
+        def record(texts):
+            seen.append(list(texts))
+            return classifier(texts)
+
+        predict = length_bucketed(record, lambda texts: [len(t.split()) for t in texts], [2, 4])
+        texts = ["moon", "a b c d e f", "dump it", "to the moon now", "x"]
+        results = predict(texts)
+
+        self.assertEqual(seen, [["moon", "dump it", "x"], ["to the moon now"], ["a b c d e f"]])
+        self.assertEqual([r["label"] for r in results], ["Bullish", "Bearish", "Bearish", "Bullish", "Bearish"])
+
+
+class TestWarmup(unittest.TestCase):
+    def test_one_full_batch_per_length_then_a_single_tweet(self):
+        batches = warmup_batches([32, 16, 64, 64], batch_size=8)
+
+        self.assertEqual([len(batch) for batch in batches], [8, 8, 8, 1])
+        self.assertEqual([len(batch[0].split()) for batch in batches], [14, 30, 62, 14])
+
+    def test_warmup_batches_run_through_the_batcher(self):
+        classifier = FakeClassifier()
+
+        async def run_test():
+            batcher = MicroBatcher(classifier, max_batch_size=8, max_wait_ms=50)
+            batcher.start()
+            for texts in warmup_batches([16, 32], batch_size=8):
+                await asyncio.gather(*(batcher.submit(text, "bulk") for text in texts))
+            await batcher.stop()
+
+        asyncio.run(run_test())
+        self.assertEqual(classifier.batch_sizes, [8, 8, 1])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,132 @@
+import unittest
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from http_client import TokenBucket
+from price_service import COIN_IDS, PriceHistoryService, UpstreamError, price_window
+from price_store import PriceStore, missing_ranges
+
+NOW = datetime(2025, 2, 8, 14, 37, 12, tzinfo=timezone.utc)
+
+
+class TestPriceWindow(unittest.TestCase):
+    def test_one_day_is_hourly_and_aligned_to_the_hour(self):
+        window = price_window(1, NOW)
+        self.assertEqual(window.interval, "1h")
+        self.assertEqual(window.end, datetime(2025, 2, 8, 14, tzinfo=timezone.utc))
+        self.assertEqual(window.end - window.start, timedelta(hours=23))
+        self.assertEqual(window.next_boundary, datetime(2025, 2, 8, 15, tzinfo=timezone.utc))
+
+    def test_longer_ranges_are_daily_and_clamped(self):
+        window = price_window(1000, NOW)
+        self.assertEqual(window.interval, "24h")
+        self.assertEqual(window.end, datetime(2025, 2, 8, tzinfo=timezone.utc))
+        self.assertEqual(window.end - window.start, timedelta(days=364))
+        self.assertEqual(window.next_boundary, datetime(2025, 2, 9, tzinfo=timezone.utc))
+
+
+class TestPriceHistoryService(unittest.TestCase):
+    def make_service(self, status_code=200, store=None, limiter=None, delay=0.01):
+        self.requests = []
+
+        async def handler(request):
+            self.requests.append(request)
+            await asyncio.sleep(delay)
+            return httpx.Response(status_code, json=[{"timestamp": "2025-02-08T00:00:00Z", "price": 96000.0}])
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return PriceHistoryService(client, retries=0, store=store, limiter=limiter)
+
+    def test_repeated_and_concurrent_requests_share_one_upstream_call(self):
+        service = self.make_service()
+
+        async def run():
+            first = await asyncio.gather(*(service.history("btc-bitcoin", 7) for _ in range(5)))
+            second = await service.history("btc-bitcoin", 7)
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0].url.params["interval"], "24h")
+        self.assertEqual(second[0]["price"], 96000.0)
+        self.assertEqual(second[0]["timestamp"], datetime(2025, 2, 8, tzinfo=timezone.utc))
+        self.assertEqual(service.stats()["coalesced"], 4)
+
+    def test_upstream_errors_are_not_cached(self):
+        service = self.make_service(status_code=402)
+        for _ in range(2):
+            with self.assertRaises(UpstreamError):
+                asyncio.run(service.history("btc-bitcoin", 1))
+        self.assertEqual(len(self.requests), 2)
+
+    def test_store_serves_history_and_fetches_only_missing_ranges(self):
+        store = PriceStore(":memory:")
+        asyncio.run(self.make_service(store=store).history("btc-bitcoin", 7))
+        self.assertEqual(len(self.requests), 1)
+
+        # A fresh service (empty cache) over the same store goes upstream only for the head
+        asyncio.run(self.make_service(store=store).history("btc-bitcoin", 30))
+        self.assertEqual(len(self.requests), 1)
+        window = price_window(30)
+        self.assertEqual(self.requests[0].url.params["start"], window.start.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        self.assertEqual(self.requests[0].url.params["end"], (window.end - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%SZ"))
+        self.assertEqual(store.coverage("btc-bitcoin", "24h"), (window.start, window.end))
+
+        asyncio.run(self.make_service(store=store).history("btc-bitcoin", 30))
+        self.assertEqual(len(self.requests), 0)
+
+    def test_coins_are_fetched_concurrently_under_the_limiter(self):
+        service = self.make_service(limiter=TokenBucket(rate=10, capacity=10), delay=0.2)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*(service.history(coin_id, 7) for coin_id in COIN_IDS.values()))
+            return loop.time() - start
+
+        elapsed = asyncio.run(run())
+        self.assertEqual(len(self.requests), len(COIN_IDS))
+        self.assertLess(elapsed, 0.4)
+
+
+class TestMissingRanges(unittest.TestCase):
+    def setUp(self):
+        self.day = lambda n: datetime(2025, 2, n, tzinfo=timezone.utc)
+
+    def test_nothing_stored_fetches_whole_window(self):
+        self.assertEqual(missing_ranges(self.day(1), self.day(8), None), [(self.day(1), self.day(8))])
+
+    def test_only_head_and_tail_are_fetched(self):
+        covered = (self.day(3), self.day(6))
+        self.assertEqual(missing_ranges(self.day(1), self.day(8), covered),
+                         [(self.day(1), self.day(3)), (self.day(6), self.day(8))])
+        self.assertEqual(missing_ranges(self.day(4), self.day(6), covered), [])
+
+    def test_disjoint_window_is_fetched_whole(self):
+        covered = (self.day(1), self.day(2))
+        self.assertEqual(missing_ranges(self.day(5), self.day(8), covered), [(self.day(5), self.day(8))])
+
+
+class TestPriceStore(unittest.TestCase):
+    def test_coverage_never_extends_past_now(self):
+        day = lambda n: datetime(2025, 2, n, tzinfo=timezone.utc)
+        store = PriceStore(":memory:")
+        # days=0 used to ask for a window ending tomorrow at midnight
+        store.write("btc-bitcoin", "24h", [{"timestamp": day(7), "price": 1.0}], day(7), day(9),
+                    now=day(8) - timedelta(hours=12))
+        self.assertEqual(store.coverage("btc-bitcoin", "24h"), (day(7), day(8) - timedelta(hours=12)))
+        # The next day's candle is still fetched
+        self.assertEqual(missing_ranges(day(1), day(8), store.coverage("btc-bitcoin", "24h")),
+                         [(day(1), day(7)), (day(8) - timedelta(hours=12), day(8))])
+
+    def test_window_entirely_in_the_future_stores_no_coverage(self):
+        day = lambda n: datetime(2025, 2, n, tzinfo=timezone.utc)
+        store = PriceStore(":memory:")
+        store.write("btc-bitcoin", "24h", [], day(9), day(10), now=day(8))
+        self.assertIsNone(store.coverage("btc-bitcoin", "24h"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+from rollups import build_rebuild_pipeline, build_rollup_updates, build_summary_pipeline, summary_window
+
+
+class TestRollupUpdates(unittest.TestCase):
+    def setUp(self):
+        self.base = datetime(2025, 2, 8, 14, 5, tzinfo=timezone.utc)
+        self.tweet = {
+            "type": "Bullish",
+            "coefficient": 0.8,
+            "followC": 100,
+            "likeC": 10,
+            "viewC": 1000,
+            "date": self.base,
+            "coinType": ["Bitcoin", "BTC"]
+        }
+
+    def test_documents_in_the_same_hour_share_one_upsert(self):
+        bearish = dict(self.tweet, type="Bearish", coefficient=0.4, date=self.base + timedelta(minutes=30))
+        updates = build_rollup_updates([self.tweet, bearish])
+        by_coin = {u._filter["coin"]: u for u in updates}
+
+        self.assertEqual(set(by_coin), {"Bitcoin", "BTC"})
+        btc = by_coin["BTC"]
+        self.assertEqual(btc._filter["hour"], datetime(2025, 2, 8, 14, tzinfo=timezone.utc))
+        self.assertTrue(btc._upsert)
+        increments = btc._doc["$inc"]
+        self.assertEqual((increments["count"], increments["bullish"], increments["bearish"]), (2, 1, 1))
+        self.assertAlmostEqual(increments["coefficient_sum"], 1.2)
+        self.assertEqual(increments["likes"], 20)
+
+    def test_new_hour_gets_its_own_bucket(self):
+        later = dict(self.tweet, date=self.base + timedelta(hours=1), coinType=["BTC"])
+        updates = build_rollup_updates([self.tweet, later])
+        self.assertEqual(len(updates), 3)
+
+
+class TestSummaryPipeline(unittest.TestCase):
+    def test_window_is_hour_aligned(self):
+        end = datetime(2025, 2, 8, 14, 30, tzinfo=timezone.utc)
+        start, _ = summary_window(None, end, default_days=1)
+        self.assertEqual(start, datetime(2025, 2, 7, 14, tzinfo=timezone.utc))
+
+    def test_daily_buckets_truncate_hours(self):
+        start, end = summary_window(None, None)
+        pipeline = build_summary_pipeline(start, end, "day", "BTC")
+
+        self.assertEqual(pipeline[0]["$match"], {"hour": {"$gte": start, "$lt": end}, "coin": "BTC"})
+        self.assertEqual(pipeline[1]["$group"]["_id"]["bucket"], {"$dateTrunc": {"date": "$hour", "unit": "day"}})
+
+    def test_rebuild_only_reads_bson_dates(self):
+        since = datetime(2025, 2, 1, 10, 30, tzinfo=timezone.utc)
+        self.assertEqual(build_rebuild_pipeline("rollups")[0]["$match"], {"date": {"$type": "date"}})
+        self.assertEqual(build_rebuild_pipeline("rollups", since)[0]["$match"],
+                         {"date": {"$gte": datetime(2025, 2, 1, 10, tzinfo=timezone.utc), "$type": "date"}})
+
+    def test_rejects_unknown_interval(self):
+        start, end = summary_window(None, None)
+        with self.assertRaises(ValueError):
+            build_summary_pipeline(start, end, "minute")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+from sentiment_queries import (
+    SENTIMENT_SORT,
+    apply_cursor,
+    build_sentiment_filter,
+    decode_cursor,
+    encode_cursor,
+    next_cursor,
+)
+
+
+class TestSentimentFilters(unittest.TestCase):
+    def test_empty_filter(self):
+        self.assertEqual(build_sentiment_filter(), {})
+
+    def test_coin_type_and_range(self):
+        start = datetime(2025, 2, 1, tzinfo=timezone.utc)
+        end = datetime(2025, 2, 8, 9, tzinfo=timezone(timedelta(hours=9)))
+        query = build_sentiment_filter("BTC", start, end, "bullish")
+
+        self.assertEqual(query["coinType"], "BTC")
+        self.assertEqual(query["type"], {"$in": ["Bullish", "bullish"]})
+        self.assertEqual(query["date"], {"$gte": start, "$lt": datetime(2025, 2, 8, tzinfo=timezone.utc)})
+
+
+class TestCursor(unittest.TestCase):
+    def setUp(self):
+        # Motor returns BSON dates as naive UTC datetimes
+        self.document = {"_id": ObjectId(), "date": datetime(2025, 2, 8, 14, 30, 0, 123000)}
+
+    def test_round_trip(self):
+        date, last_id = decode_cursor(encode_cursor(self.document))
+        self.assertEqual(date, self.document["date"].replace(tzinfo=timezone.utc))
+        self.assertEqual(last_id, self.document["_id"])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_is_combined_with_filter(self):
+        query = apply_cursor({"coinType": "BTC"}, encode_cursor(self.document))
+        self.assertEqual(query["$and"][0], {"coinType": "BTC"})
+        self.assertEqual(query["$and"][1]["$or"][1]["_id"], {"$lt": self.document["_id"]})
+
+    def test_short_page_has_no_next_cursor(self):
+        self.assertIsNone(next_cursor([self.document], limit=2))
+        self.assertIsNotNone(next_cursor([self.document, self.document], limit=2))
+
+    def test_unmigrated_string_date_round_trips_as_string(self):
+        legacy = {"_id": ObjectId(), "date": "2025-01-05T10:00:00"}
+        date, last_id = decode_cursor(encode_cursor(legacy))
+        self.assertEqual((date, last_id), ("2025-01-05T10:00:00", legacy["_id"]))
+
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestMixedDatePaging(unittest.TestCase):
+    """Until migrate_dates.py has run, a page can hold BSON dates and ISO strings"""
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient(tz_aware=True).db.sentiments
+        self.collection.insert_many([
+            {"_id": ObjectId(), "date": datetime(2025, 2, 8, tzinfo=timezone.utc)},
+            {"_id": ObjectId(), "date": "2025-01-05T10:00:00"},
+            {"_id": ObjectId(), "date": "2025-01-06T10:00:00Z"},
+            {"_id": ObjectId(), "date": datetime(2025, 2, 7, tzinfo=timezone.utc)},
+            {"_id": ObjectId(), "date": "2025-01-04T10:00:00"},
+        ])
+
+    def page_through(self, query, limit):
+        seen, cursor = [], None
+        while True:
+            page = list(self.collection.find(apply_cursor(query, cursor)).sort(SENTIMENT_SORT).limit(limit))
+            seen.extend(page)
+            cursor = next_cursor(page, limit)
+            if cursor is None:
+                return seen
+
+    def test_every_document_is_reached_once_in_sort_order(self):
+        expected = list(self.collection.find().sort(SENTIMENT_SORT))
+        for limit in (1, 2, 3):
+            seen = self.page_through({}, limit)
+            self.assertEqual([d["_id"] for d in seen], [d["_id"] for d in expected])
+        # Native dates first, then the unmigrated strings
+        self.assertEqual([type(d["date"]) for d in expected], [datetime] * 2 + [str] * 3)
+
+    def test_date_filters_only_page_through_native_dates(self):
+        query = build_sentiment_filter(start=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        seen = self.page_through(query, 1)
+        self.assertEqual([d["date"].day for d in seen], [8, 7])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
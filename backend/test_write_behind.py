@@ -0,0 +1,231 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from sequence import assign_sequence, data_version, mark_committed
+from write_behind import WriteAheadLog, WriteBehindBuffer, WriteBehindFull
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = {}
+        self.calls = 0
+        self.down = False
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.down:
+            raise AutoReconnect("mongo is down")
+        errors = []
+        for index, document in enumerate(documents):
+            if document["_id"] in self.documents:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.documents[document["_id"]] = document
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeCounters:
+    def __init__(self):
+        self.counters = {}
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        counter = self.counters.setdefault(query["_id"], {"_id": query["_id"]})
+        for field, amount in update["$inc"].items():
+            counter[field] = counter.get(field, 0) + amount
+        return dict(counter)
+
+    async def update_one(self, query, update, upsert=False):
+        await self.find_one_and_update(query, update, upsert)
+
+    async def find_one(self, query, projection=None):
+        return self.counters.get(query["_id"])
+
+
+def tweet(n):
+    return {"_id": ObjectId(), "type": "Bullish", "n": n}
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.collection = FakeCollection()
+        self.flushed = []
+
+    async def on_flush(self, documents):
+        self.flushed.extend(documents)
+
+    def make_buffer(self, **kwargs):
+        kwargs.setdefault("flush_interval_ms", 5)
+        return WriteBehindBuffer(self.collection, WriteAheadLog(self.directory), on_flush=self.on_flush,
+                                 retry_backoff=0.01, **kwargs)
+
+    def test_concurrent_submissions_share_a_group_commit_and_a_flush(self):
+        async def run():
+            buffer = self.make_buffer(flush_size=1000, flush_interval_ms=50)
+            buffer.start()
+            await asyncio.gather(*(buffer.submit([tweet(n)]) for n in range(20)))
+            commits = buffer.group_commits
+            await asyncio.sleep(0.1)
+            await buffer.stop()
+            return commits
+
+        self.assertEqual(asyncio.run(run()), 1)
+        self.assertEqual(len(self.collection.documents), 20)
+        self.assertEqual(self.collection.calls, 1)
+        self.assertEqual(len(self.flushed), 20)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_each_process_claims_its_own_slot(self):
+        first = WriteAheadLog.claim(self.directory)
+        second = WriteAheadLog.claim(self.directory)
+        self.assertEqual([os.path.basename(log.directory) for log in (first, second)], ["0", "1"])
+        first.close()
+        self.assertEqual(os.path.basename(WriteAheadLog.claim(self.directory).directory), "0")
+
+    def test_segments_in_idle_slots_are_adopted(self):
+        busy = WriteAheadLog.claim(self.directory)
+        busy.append([tweet(0)])
+        # Left behind by a worker of an earlier run with more workers
+        orphan = WriteAheadLog(os.path.join(self.directory, "2"))
+        orphan.append([tweet(1), tweet(2)])
+        orphan.close()
+
+        log = WriteAheadLog.claim(self.directory)
+        self.assertEqual(os.path.basename(log.directory), "1")
+        self.assertEqual([d["n"] for d in log.replay()], [1, 2])
+        self.assertEqual(WriteAheadLog(os.path.join(self.directory, "2")).segments(), [])
+        self.assertEqual([d["n"] for d in busy.replay()], [0])
+        busy.close()
+        log.close()
+
+    def test_unflushed_documents_are_replayed_after_a_crash(self):
+        async def crash():
+            # Submitted but never flushed: the process dies before the loops run again
+            buffer = self.make_buffer(flush_interval_ms=60000, flush_size=1000)
+            buffer.start()
+            await buffer.submit([tweet(1), tweet(2)])
+
+        async def restart():
+            buffer = self.make_buffer()
+            buffer.start()
+            await asyncio.sleep(0.05)
+            replayed = buffer.replayed
+            await buffer.stop()
+            return replayed
+
+        asyncio.run(crash())
+        self.assertEqual(self.collection.documents, {})
+        self.assertEqual(asyncio.run(restart()), 2)
+        self.assertEqual(sorted(d["n"] for d in self.collection.documents.values()), [1, 2])
+
+    def test_replay_skips_documents_already_in_mongo_and_torn_tails(self):
+        wal = WriteAheadLog(self.directory)
+        first, second = tweet(1), tweet(2)
+        wal.append([first, second])
+        wal.close()
+        self.collection.documents[first["_id"]] = first
+        with open(wal.segments()[0], "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x02ty")  # half-written record
+
+        async def restart():
+            buffer = self.make_buffer()
+            buffer.start()
+            await buffer.stop()
+
+        asyncio.run(restart())
+        self.assertEqual(len(self.collection.documents), 2)
+        self.assertEqual([d["n"] for d in self.flushed], [2])
+
+    def test_failed_flush_keeps_documents_until_mongo_recovers(self):
+        async def run():
+            buffer = self.make_buffer()
+            buffer.start()
+            self.collection.down = True
+            await buffer.submit([tweet(1)])
+            await asyncio.sleep(0.05)
+            segments = len(WriteAheadLog(self.directory).segments())
+            self.collection.down = False
+            await asyncio.sleep(0.05)
+            stats = buffer.stats()
+            await buffer.stop()
+            return segments, stats
+
+        segments, stats = asyncio.run(run())
+        self.assertGreaterEqual(segments, 1)
+        self.assertGreater(stats["flush_failures"], 0)
+        self.assertEqual(stats["flushed"], 1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_submissions_past_the_bound_are_refused(self):
+        async def run():
+            buffer = self.make_buffer(max_buffered=2, flush_interval_ms=60000, flush_size=1000)
+            buffer.start()
+            await buffer.submit([tweet(1), tweet(2)])
+            with self.assertRaises(WriteBehindFull):
+                await buffer.submit([tweet(3)])
+            await buffer.stop()
+
+        asyncio.run(run())
+
+    def test_late_documents_move_the_data_version_and_get_a_newer_seq(self):
+        counters = FakeCounters()
+        older, newer = tweet(1), tweet(2)
+        wal = WriteAheadLog(self.directory)
+        wal.append([older])
+        wal.close()
+
+        async def on_flush(documents):
+            self.flushed.extend(documents)
+            await mark_committed(counters, len(documents))
+
+        async def run():
+            # Another worker already stored a document with a newer _id
+            await assign_sequence(counters, [newer])
+            self.collection.documents[newer["_id"]] = newer
+            await mark_committed(counters, 1)
+            before = await data_version(counters)
+
+            buffer = WriteBehindBuffer(self.collection, WriteAheadLog(self.directory), on_flush=on_flush,
+                                       before_insert=lambda documents: assign_sequence(counters, documents))
+            buffer.start()
+            await buffer.stop()
+            return before, await data_version(counters)
+
+        before, after = asyncio.run(run())
+        self.assertLess(older["_id"], newer["_id"])
+        self.assertEqual(len(self.collection.documents), 2)
+        self.assertNotEqual(before, after)
+        self.assertGreater(self.collection.documents[older["_id"]]["seq"], newer["seq"])
+
+    def test_documents_waiting_for_the_wal_count_against_the_bound(self):
+        async def run():
+            buffer = self.make_buffer(max_buffered=3, flush_interval_ms=60000, flush_size=1000)
+            buffer.start()
+            # Queued for the next group commit, not yet in the buffer
+            pending = asyncio.ensure_future(buffer.submit([tweet(1), tweet(2), tweet(3)]))
+            await asyncio.sleep(0)
+            with self.assertRaises(WriteBehindFull):
+                await buffer.submit([tweet(4)])
+            await pending
+            await buffer.stop()
+
+        asyncio.run(run())
+
+    def test_replayed_dates_are_utc_aware(self):
+        wal = WriteAheadLog(self.directory)
+        wal.append([{**tweet(1), "date": datetime(2025, 2, 8, 14, 30, tzinfo=timezone.utc)}])
+        wal.close()
+
+        date = WriteAheadLog(self.directory).replay()[0]["date"]
+        self.assertEqual(date.isoformat(), "2025-02-08T14:30:00+00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import asyncio
+import fcntl
+import itertools
+import os
+from typing import Callable, Dict, List, Optional
+
+import bson
+from bson.codec_options import CodecOptions
+from pymongo.errors import BulkWriteError
+
+# Duplicate key: the document was already inserted before a crash and is being replayed
+DUPLICATE_KEY = 11000
+# Replayed dates come back UTC-aware, like documents read through the tz_aware Motor client
+WAL_CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+
+class WriteBehindFull(Exception):
+    """The buffer holds max_buffered documents that Mongo has not accepted yet"""
+
+
+class WriteAheadLog:
+    """
+    Append-only segments of BSON documents in ``directory``.
+
+    Each BSON document carries its own length, so a segment is replayed with
+    ``bson.decode_file_iter`` and a record torn by a crash mid-write is dropped.
+    Segments are sealed by ``rotate`` and deleted once their documents are in Mongo.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True, lock_file=None):
+        self.directory = directory
+        self.fsync = fsync
+        self.lock_file = lock_file
+        os.makedirs(directory, exist_ok=True)
+        existing = self.segments()
+        self.sequence = self._sequence_of(existing[-1]) + 1 if existing else 0
+        self.active = None
+
+    @classmethod
+    def claim(cls, base_directory: str, fsync: bool = True) -> "WriteAheadLog":
+        """
+        Log in the first free slot under ``base_directory`` (0, 1, ...), locked
+        for the life of the process. Pre-forked workers each get their own slot,
+        and a respawned worker takes over the slot (and pending segments) of
+        the one that died, since the kernel drops its lock on exit. Segments
+        left in other unlocked slots, e.g. after restarting with fewer workers,
+        are adopted into this log so they are replayed too.
+        """
+        for slot in itertools.count():
+            directory = os.path.join(base_directory, str(slot))
+            lock_file = cls._lock(directory)
+            if lock_file is None:
+                continue
+            log = cls(directory, fsync, lock_file)
+            log.adopt(base_directory)
+            return log
+
+    @staticmethod
+    def _lock(directory: str):
+        """Open and flock the slot's lock file, or None if another process holds it"""
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, ".lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def adopt(self, base_directory: str) -> int:
+        """
+        Move the documents of every unlocked slot under ``base_directory`` into
+        this log, then delete that slot's segments and release it. They are
+        written (and fsynced) here before being removed there, so a crash in
+        between only causes harmless duplicate inserts on replay.
+        """
+        adopted = 0
+        for name in sorted(os.listdir(base_directory)):
+            directory = os.path.join(base_directory, name)
+            if directory == self.directory or not os.path.isdir(directory):
+                continue
+            lock_file = self._lock(directory)
+            if lock_file is None:
+                continue
+            orphan = WriteAheadLog(directory, self.fsync, lock_file)
+            try:
+                segments = orphan.segments()
+                documents = orphan.replay()
+                if documents:
+                    self.append(documents)
+                    self.rotate()
+                orphan.remove(segments)
+                adopted += len(documents)
+            finally:
+                orphan.close()
+        if adopted:
+            print(f"[INFO] Adopted {adopted} write-behind documents from idle WAL slots")
+        return adopted
+
+    @staticmethod
+    def _sequence_of(path: str) -> int:
+        return int(os.path.basename(path)[len("wal-"):-len(".bson")])
+
+    def segments(self) -> List[str]:
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith("wal-") and name.endswith(".bson"))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def replay(self) -> List[Dict]:
+        documents = []
+        for path in self.segments():
+            with open(path, "rb") as f:
+                try:
+                    for document in bson.decode_file_iter(f, codec_options=WAL_CODEC_OPTIONS):
+                        documents.append(document)
+                except bson.errors.InvalidBSON:
+                    print(f"[WARN] Dropping torn record at the end of {path}")
+        return documents
+
+    def append(self, documents: List[Dict]):
+        """Blocking: write and (optionally) fsync one group of documents"""
+        if self.active is None:
+            path = os.path.join(self.directory, f"wal-{self.sequence:010d}.bson")
+            self.active = open(path, "ab")
+        self.active.write(b"".join(bson.encode(document) for document in documents))
+        self.active.flush()
+        if self.fsync:
+            os.fsync(self.active.fileno())
+
+    def rotate(self) -> List[str]:
+        """Seal the active segment; returns every segment written so far"""
+        if self.active is not None:
+            self.active.close()
+            self.active = None
+            self.sequence += 1
+        return self.segments()
+
+    def remove(self, paths: List[str]):
+        for path in paths:
+            os.remove(path)
+
+    def close(self):
+        if self.active is not None:
+            self.active.close()
+            self.active = None
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class WriteBehindBuffer:
+    """Acknowledges documents once they are in the local WAL and inserts them into Mongo later.
+
+    Concurrent submissions are written to the WAL as one group (one write and
+    one fsync). Buffered documents are flushed with a single unordered
+    ``insert_many`` every ``flush_size`` documents or ``flush_interval_ms``.
+    ``before_insert`` may stamp the documents right before each insert attempt,
+    and ``on_flush`` receives the documents Mongo accepted. Documents left in
+    the WAL by a crash are replayed on ``start``; their pre-assigned ``_id``
+    makes a repeated insert a harmless duplicate-key error.
+    """
+
+    def __init__(self,
+                 collection,
+                 wal: WriteAheadLog,
+                 flush_size: int = 500,
+                 flush_interval_ms: float = 200.0,
+                 max_buffered: int = 100000,
+                 on_flush: Optional[Callable] = None,
+                 retry_backoff: float = 1.0,
+                 before_insert: Optional[Callable] = None):
+        self.collection = collection
+        self.wal = wal
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.max_buffered = max_buffered
+        self.on_flush = on_flush
+        self.before_insert = before_insert
+        self.retry_backoff = retry_backoff
+        self.buffer: List[Dict] = []
+        self.incoming: List = []
+        self.lock: Optional[asyncio.Lock] = None
+        self._incoming_ready: Optional[asyncio.Event] = None
+        self._flush_ready: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.replayed = 0
+        self.group_commits = 0
+        self.flushed = 0
+        self.flush_failures = 0
+
+    def start(self):
+        """Replay the WAL into the buffer and start the writer and flush loops"""
+        if self._writer is not None:
+            return
+        self.lock = asyncio.Lock()
+        self._stopping = False
+        self._incoming_ready = asyncio.Event()
+        self._flush_ready = asyncio.Event()
+        self.buffer = self.wal.replay()
+        self.replayed = len(self.buffer)
+        loop = asyncio.get_running_loop()
+        self._writer = loop.create_task(self._write_loop())
+        self._flusher = loop.create_task(self._flush_loop())
+        if self.buffer:
+            self._flush_ready.set()
+
+    async def stop(self):
+        """Stop the loops, then write and flush whatever is left"""
+        if self._writer is None:
+            return
+        # New submissions are refused from here on
+        self._stopping = True
+        # Taking the lock waits out a WAL write in progress
+        async with self.lock:
+            self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        if self.incoming:
+            await self._write_group()
+
+        # The flusher is never cancelled mid-insert: it finishes its current
+        # flush and exits, then anything left goes out in one last flush
+        self._flush_ready.set()
+        await self._flusher
+        self._writer = self._flusher = None
+        if self.buffer:
+            await self._flush()
+        self.wal.close()
+
+    async def submit(self, documents: List[Dict]):
+        """Wait until the documents are durable in the WAL"""
+        if self._writer is None or self._stopping:
+            raise RuntimeError("Write-behind buffer is not running")
+        if not documents:
+            return
+        pending = len(self.buffer) + sum(len(batch) for batch, _ in self.incoming)
+        if pending + len(documents) > self.max_buffered:
+            raise WriteBehindFull(f"{len(self.buffer)} documents are waiting for Mongo")
+        future = asyncio.get_running_loop().create_future()
+        self.incoming.append((documents, future))
+        self._incoming_ready.set()
+        await future
+
+    async def _write_loop(self):
+        while True:
+            await self._incoming_ready.wait()
+            self._incoming_ready.clear()
+            await self._write_group()
+
+    async def _write_group(self):
+        # Held across the write so a flush never rotates a segment whose
+        # documents haven't reached the buffer yet
+        async with self.lock:
+            group, self.incoming = self.incoming, []
+            documents = [document for batch, _ in group for document in batch]
+            if not documents:
+                return
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.wal.append, documents)
+            except Exception as e:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.buffer.extend(documents)
+        self.group_commits += 1
+        for _, future in group:
+            if not future.done():
+                future.set_result(None)
+        if len(self.buffer) >= self.flush_size:
+            self._flush_ready.set()
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_ready.clear()
+            if self.buffer and not await self._flush() and not self._stopping:
+                await asyncio.sleep(self.retry_backoff)
+
+    async def _flush(self) -> bool:
+        async with self.lock:
+            documents, self.buffer = self.buffer, []
+            sealed = self.wal.rotate()
+
+        inserted = documents
+        try:
+            if self.before_insert is not None:
+                await self.before_insert(documents)
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Mongo saw the whole batch. Duplicates are replayed documents that
+            # were already inserted; anything else was rejected and would only fail again.
+            errors = e.details.get("writeErrors", [])
+            for error in errors:
+                if error.get("code") != DUPLICATE_KEY:
+                    print("[WARN] Write-behind dropped a rejected document:", error.get("errmsg"))
+            failed = {error["index"] for error in errors}
+            inserted = [document for index, document in enumerate(documents) if index not in failed]
+        except Exception as e:
+            return self._requeue(documents, e)
+
+        self.wal.remove(sealed)
+        self.flushed += len(inserted)
+        if self.on_flush is not None and inserted:
+            await self.on_flush(inserted)
+        return True
+
+    def _requeue(self, documents: List[Dict], error: Exception) -> bool:
+        # Mongo unreachable: the sealed segments stay on disk and are removed by the next successful flush
+        self.flush_failures += 1
+        self.buffer[:0] = documents
+        print(f"[WARN] Write-behind flush of {len(documents)} documents failed:", str(error))
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self.buffer),
+            "replayed": self.replayed,
+            "group_commits": self.group_commits,
+            "flushed": self.flushed,
+            "flush_failures": self.flush_failures,
+            "wal_segments": len(self.wal.segments()),
+        }